@@ -12,3 +12,11 @@ output_dir  = _root / 'out'
 languages      = ['english'] # ['chinese', 'english']
 language_codes = ['en'] # ['zh', 'en']
 wiki_language  = 'english'
+
+# How localization tables are held in memory: 'pool' keeps each language as a
+# compact string pool memory-mapped from the cache, 'dict' as plain dictionaries.
+text_backend   = 'pool'
+
+# How many asset files a sweep reads ahead of the one it is processing, on a
+# thread pool. Helps most when the asset files aren't in the OS file cache yet.
+prefetch_depth = 16
@@ -0,0 +1,82 @@
+'''
+Cache the results of each item source pass, so that rerunning the analysis only
+reruns the passes whose inputs changed.
+
+A pass's inputs are the designer configs it reads, recorded while it runs, plus
+the preproc caches and asset paths it declares, and the code of the pass and of
+the sandrock modules it and the shared helpers import. The
+partial results are stored with the recorded config keys and a fingerprint of
+all inputs; the next run fingerprints the same inputs again and reuses the
+results if nothing changed.
+'''
+
+from __future__ import annotations
+
+from sandrock.common              import *
+from sandrock.lib.designer_config import record_reads
+from sandrock.preproc             import _get_cache_inputs, _write_cache, fingerprint_paths, get_config_paths
+from .common                      import *
+
+import hashlib
+import types
+
+# ------------------------------------------------------------------------------
+
+# Run a pass into a new partial result, or load its results from the last run if
+# its inputs are unchanged. `inputs` are preproc cache keys or asset paths. Also
+# returns whether the results came from the cache.
+def run_cached_pass(
+    name:   str,
+    update: Callable[[Results], None],
+    inputs: Iterable[PathLike],
+) -> tuple[Results, bool]:
+    cache_path = config.cache_root / 'item_sources' / f'{name}.json'
+    paths      = _input_paths(update, inputs)
+    partial    = defaultdict(SourceIds)
+
+    try:
+        cache = read_json(cache_path)
+        if cache['version'] == config.version and cache['fingerprint'] == _fingerprint(cache['config_keys'], paths):
+            for item_id, sources in cache['data'].items():
+                partial[int(item_id)].update(map(tuple, sources))
+            return partial, True
+    except Exception:
+        pass
+
+    with record_reads() as config_keys:
+        update(partial)
+
+    config_keys = sorted(config_keys)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_cache(cache_path, {
+        'version':     config.version,
+        'fingerprint': _fingerprint(config_keys, paths),
+        'config_keys': config_keys,
+        'data':        {item_id: sorted(render_sources(sources)) for item_id, sources in partial.items()},
+    })
+    return partial, False
+
+# -- Private -------------------------------------------------------------------
+
+def _input_paths(update: Callable[[Results], None], inputs: Iterable[PathLike]) -> list[PathLike]:
+    paths = _module_paths(update.__module__) + _module_paths(f'{__package__}.common')
+    for input_ in inputs:
+        cache_inputs = _get_cache_inputs(input_) if isinstance(input_, str) else None
+        paths       += cache_inputs if cache_inputs is not None else [input_]
+    return paths
+
+# A module's file and the files of the sandrock modules it imports names from,
+# e.g. sandrock/lib/generator.py for the helpers in item_source/common.py.
+def _module_paths(module_name: str) -> list[Path]:
+    module_names = {module_name}
+    for value in vars(sys.modules[module_name]).values():
+        name = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, '__module__', None)
+        if isinstance(name, str) and name.startswith('sandrock.') and name in sys.modules:
+            module_names.add(name)
+    return sorted(Path(sys.modules[name].__file__) for name in module_names if getattr(sys.modules[name], '__file__', None))
+
+def _fingerprint(config_keys: list[str], paths: list[PathLike]) -> str:
+    config_paths = get_config_paths()['designer_config']
+    # A config that no longer exists fingerprints as missing.
+    config_paths = [config_paths.get(key, config.assets_root / 'designer_config' / key) for key in config_keys]
+    return hashlib.sha1(repr((config_keys, fingerprint_paths(config_paths + paths))).encode('utf-8')).hexdigest()
@@ -2,12 +2,33 @@
 Types and helper functions for cataloging item source.
 '''
 
+from __future__ import annotations
+
 from sandrock.common              import *
 from sandrock.lib.designer_config import DesignerConfig
+from sandrock.lib.generator       import load_generator_table
+
+from typing import NamedTuple
+
+import threading
 
 __all__ = [
     'ItemSource',
     'Results',
+    'Rule',
+    'SourceIds',
+    'SourceRef',
+    'SourceTable',
+    'TrackedResults',
+    'apply_rules',
+    'gives_generators',
+    'gives_items',
+    'propagate',
+    'render_results',
+    'render_sources',
+    'source_table',
+    'structure_results',
+    'structure_sources',
     'update_generator',
     'update_mail'
 ]
@@ -15,19 +36,135 @@ __all__ = [
 ItemSource: TypeAlias = tuple[str] | tuple[str, str] | tuple[str, str, str] | tuple[str, str, str, str]
 Results: TypeAlias = dict[int, list[ItemSource]]
 
+# -- Sources -------------------------------------------------------------------
+
+# A reference in a source, like 'scene:60' or 'mission:1200403', as its kind and
+# ID. IDs that are numbers are ints. Prints as the string it was read from.
+class SourceRef(NamedTuple):
+    kind: str
+    id:   int | str
+
+    def __str__(self) -> str:
+        return f'{self.kind}:{self.id}'
+
+# Every distinct source, stored once and numbered. The same few thousand sources
+# are found for hundreds of thousands of items, so results hold source IDs and
+# the tuples are only looked up again when they are written out. Each source is
+# also kept with its references parsed, for code that reads the sources.
+class SourceTable:
+    def __init__(self):
+        self._ids     = {}
+        self._sources = []
+        self._fields  = []
+        # Passes run on several threads and may intern the same new source.
+        self._lock    = threading.Lock()
+
+    def intern(self, source: ItemSource | int) -> int:
+        if isinstance(source, int):
+            return source
+        source = tuple(source)
+        id_    = self._ids.get(source)
+        if id_ is None:
+            with self._lock:
+                id_ = self._ids.get(source)
+                if id_ is None:
+                    id_ = len(self._sources)
+                    self._sources.append(source)
+                    self._fields.append(_parse_fields(source))
+                    self._ids[source] = id_
+        return id_
+
+    # The ID of a source, or None if it was never interned.
+    def find(self, source: ItemSource) -> int | None:
+        return self._ids.get(tuple(source))
+
+    def __getitem__(self, id_: int) -> ItemSource:
+        return self._sources[id_]
+
+    # A source with every 'kind:id' string in it as a SourceRef.
+    def fields(self, source: ItemSource | int) -> tuple:
+        return self._fields[self.intern(source)]
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+source_table = SourceTable()
+
+# The sources of one item, as IDs in `source_table`. Sources can be added and
+# removed as tuples, like a set of tuples.
+class SourceIds(set):
+    def add(self, source: ItemSource | int) -> None:
+        super().add(source_table.intern(source))
+
+    # Removing a source that was never interned leaves the table alone.
+    def discard(self, source: ItemSource | int) -> None:
+        id_ = _find_id(source)
+        if id_ is not None:
+            super().discard(id_)
+
+    def remove(self, source: ItemSource | int) -> None:
+        id_ = _find_id(source)
+        if id_ is None:
+            raise KeyError(source)
+        super().remove(id_)
+
+    def update(self, *sources: Iterable[ItemSource | int]) -> None:
+        for iterable in sources:
+            super().update(map(source_table.intern, iterable))
+
+    def difference_update(self, *sources: Iterable[ItemSource | int]) -> None:
+        for iterable in sources:
+            super().difference_update(id_ for id_ in map(_find_id, iterable) if id_ is not None)
+
+    def __ior__(self, sources: Iterable[ItemSource | int]) -> SourceIds:
+        self.update(sources)
+        return self
+
+    def __contains__(self, source: object) -> bool:
+        if isinstance(source, tuple):
+            source = source_table.find(source)
+        return super().__contains__(source)
+
+def render_sources(sources: Iterable[ItemSource | int]) -> list[ItemSource]:
+    return [source_table[source] if isinstance(source, int) else source for source in sources]
+
+# Results with the source tuples looked up again, for writing them out.
+def render_results(results: Results) -> dict[int, set[ItemSource]]:
+    return {item_id: set(render_sources(sources)) for item_id, sources in results.items()}
+
+def structure_sources(sources: Iterable[ItemSource | int]) -> list[tuple]:
+    return [source_table.fields(source) for source in sources]
+
+# Results with each source's references parsed, for reading them.
+def structure_results(results: Results) -> dict[int, set[tuple]]:
+    return {item_id: set(structure_sources(sources)) for item_id, sources in results.items()}
+
+def _find_id(source: ItemSource | int) -> int | None:
+    return source if isinstance(source, int) else source_table.find(source)
+
+def _parse_fields(value: Any) -> Any:
+    if isinstance(value, tuple):
+        return tuple(_parse_fields(part) for part in value)
+    if isinstance(value, str) and ':' in value:
+        kind, _, id_ = value.partition(':')
+        return SourceRef(kind, int(id_) if id_.isdigit() else id_)
+    return value
+
+# ------------------------------------------------------------------------------
+
 def update_generator(results: Results, source: ItemSource, group_id: int) -> None:
-    group = DesignerConfig.GeneratorGroup.get(group_id)
-    if group is None:
+    table    = load_generator_table()
+    item_ids = table['source_items'].get(group_id)
+    if item_ids is None:
         return
+    if group_id in table['source_errors']:
+        missing_id = table['source_errors'][group_id]
+        assert missing_id is not None, f'Generator group {group_id} has an entry weighted 0 or less'
+        raise KeyError(missing_id)
 
     source = tuple(source)
-    for element in group['elements']:
-        for id_w in element['idWeights']:
-            assert id_w['weight'] > 0
-            gen = DesignerConfig.Generator_Item[id_w['id']]
-            if gen['randomType'] == 0 and gen['parameters'][0] == 0:
-                continue
-            results[gen['itemId']].add(source)
+    for item_id in item_ids:
+        results[item_id].add(source)
 
 def update_mail(results: Results, source: ItemSource, mail_id: int) -> None:
     mail = DesignerConfig.MailTemplate.get(mail_id)
@@ -37,3 +174,106 @@ def update_mail(results: Results, source: ItemSource, mail_id: int) -> None:
         if attach['type'] == 1:
             item_id = attach['data']['id']
             results[item_id].add(tuple(source))
+
+# -- Rules ---------------------------------------------------------------------
+
+# A source that depends on other items being available, e.g. a recipe and its
+# materials. It is ready once every item in `requires_all` is available and, if
+# `requires_any` is given, at least one of those is too; `fire` then adds its
+# outputs. Readiness only ever goes from false to true, so a rule needs to fire
+# at most once.
+class Rule:
+    def __init__(
+        self,
+        fire:         Callable[[Results], None],
+        requires_all: Iterable[int] = (),
+        requires_any: Iterable[int] | None = None,
+    ):
+        self.fire         = fire
+        self.requires_all = tuple(requires_all)
+        self.requires_any = None if requires_any is None else tuple(requires_any)
+
+    @property
+    def inputs(self) -> tuple[int, ...]:
+        return self.requires_all + (self.requires_any or ())
+
+    def is_ready(self, results: Results) -> bool:
+        if not all(item_id in results for item_id in self.requires_all):
+            return False
+        return self.requires_any is None or any(item_id in results for item_id in self.requires_any)
+
+def gives_items(item_ids: Iterable[int], source: ItemSource) -> Callable[[Results], None]:
+    item_ids = list(item_ids)
+    source   = tuple(source)
+    def fire(results: Results) -> None:
+        for item_id in item_ids:
+            results[item_id].add(source)
+    return fire
+
+def gives_generators(group_ids: Iterable[int], source: ItemSource) -> Callable[[Results], None]:
+    group_ids = list(group_ids)
+    def fire(results: Results) -> None:
+        for group_id in group_ids:
+            update_generator(results, source, group_id)
+    return fire
+
+# Evaluate each rule once, in order, like a single pass over the configs.
+def apply_rules(results: Results, rules: list[Rule]) -> None:
+    for rule in rules:
+        if rule.is_ready(results):
+            rule.fire(results)
+
+# Results that remember which items became available since they were last
+# asked, so that propagation can wake only the rules that depend on them.
+class TrackedResults(defaultdict):
+    def __init__(self, *args: Any):
+        super().__init__(SourceIds, *args)
+        self._new_items = []
+
+    def __missing__(self, key: int) -> set:
+        self._new_items.append(key)
+        return super().__missing__(key)
+
+    def take_new_items(self) -> list[int]:
+        new_items, self._new_items = self._new_items, []
+        return new_items
+
+# Fire rules until no more become ready. The first round evaluates every rule;
+# after that, only unfired rules with an input that became newly available are
+# evaluated again. Returns the number of rounds and of rule evaluations.
+#
+# With a graph (an `AcquisitionGraph`), each rule that fires is recorded in it
+# along with the items it gave.
+def propagate(results: TrackedResults, rules: list[Rule], graph: Any = None) -> tuple[int, int]:
+    rules_by_input = defaultdict(list)
+    for index, rule in enumerate(rules):
+        for item_id in rule.inputs:
+            rules_by_input[item_id].append(index)
+
+    fired       = [False] * len(rules)
+    pending     = range(len(rules))
+    rounds      = 0
+    evaluations = 0
+    results.take_new_items()
+
+    while pending:
+        rounds += 1
+        for index in pending:
+            if fired[index]:
+                continue
+            evaluations += 1
+            if rules[index].is_ready(results):
+                fired[index] = True
+                if graph is None:
+                    rules[index].fire(results)
+                    continue
+                outputs = defaultdict(set)
+                rules[index].fire(outputs)
+                graph.add_rule(rules[index], outputs)
+                for item_id, sources in outputs.items():
+                    results[item_id].update(sources)
+
+        woken   = {index for item_id in results.take_new_items() for index in rules_by_input.get(item_id, ())}
+        pending = sorted(index for index in woken if not fired[index])
+
+    return rounds, evaluations
@@ -5,94 +5,120 @@ Find all the items the player can craft through various means.
 from sandrock.common              import *
 from sandrock.lib.designer_config import DesignerConfig
 from sandrock.lib.text            import text
-from sandrock.structures.story    import Story
+from sandrock.structures.story    import get_story
 from .common                      import *
 
 # ------------------------------------------------------------------------------
 
 def update_crafting(results: Results) -> None:
-    update_assembly(results)
-    update_crafting_stations(results)
-    update_recycle(results)
-    update_cooking(results)
-    update_restoring(results)
-    update_ore_refining(results)
+    apply_rules(results, crafting_rules())
 
 def update_assembly(results: Results) -> None:
+    apply_rules(results, _assembly_rules())
+
+def update_crafting_stations(results: Results) -> None:
+    apply_rules(results, _crafting_station_rules())
+
+def update_recycle(results: Results) -> None:
+    apply_rules(results, _recycle_rules())
+
+def update_cooking(results: Results) -> None:
+    apply_rules(results, _cooking_rules())
+
+def update_restoring(results: Results) -> None:
+    apply_rules(results, _restoring_rules())
+
+def update_ore_refining(results: Results) -> None:
+    apply_rules(results, _ore_refining_rules())
+
+# Every crafting recipe as a rule on its materials, in the order the passes
+# above run.
+def crafting_rules() -> list[Rule]:
+    return (
+        _assembly_rules()
+        + _crafting_station_rules()
+        + _recycle_rules()
+        + _cooking_rules()
+        + _restoring_rules()
+        + _ore_refining_rules()
+    )
+
+# -- Private -------------------------------------------------------------------
+
+@cache
+def _assembly_rules() -> list[Rule]:
+    rules = []
     for recipe in DesignerConfig.Creation:
         assert recipe['fromMachineLevel'] < 4, f'Assembly recipe {text.item(recipe["itemId"])} has invalid level {recipe["fromMachineLevel"]}'
 
-        # Confirm that all parts are available.
-        ready = True
-        for part_id in recipe['partIds']:
-            part = DesignerConfig.CreationPart[part_id]
-            mat = part['material']['x']
-            if mat not in results:
-                ready = False
-        if ready:
-            source = ('crafting', 'assemble', recipe['fromMachineLevel'])
-            results[recipe['itemId']].add(source)
+        # All parts must be available.
+        mats   = [DesignerConfig.CreationPart[part_id]['material']['x'] for part_id in recipe['partIds']]
+        source = ('crafting', 'assemble', recipe['fromMachineLevel'])
+        rules.append(Rule(gives_items([recipe['itemId']], source), requires_all=mats))
+    return rules
 
-def update_crafting_stations(results: Results) -> None:
+@cache
+def _crafting_station_rules() -> list[Rule]:
+    rules = []
     for recipe in DesignerConfig.Synthetics:
+        item_id   = recipe['itemId']
+        unlockers = _get_recipe_unlockers()[item_id]
+        mats      = [mat['x'] for mat in recipe['rawMaterials']]
+
+        # TODO: Temporary workround until we are more robust in finding
+        # blueprint sources.
+        requires_any = None if 'mission' in unlockers else unlockers
+        rules.append(Rule(_make_station_fire(recipe), requires_all=mats, requires_any=requires_any))
+    return rules
+
+def _make_station_fire(recipe: dict) -> Callable[[Results], None]:
+    def fire(results: Results) -> None:
         item_id = recipe['itemId']
-        ready = False
-        for unlocker in _get_recipe_unlockers()[item_id]:
-            # TODO: Temporary workround until we are more robust in finding
-            # blueprint sources.
-            if unlocker in results or unlocker == 'mission':
-                ready = True
-        for mat in recipe['rawMaterials']:
-            if mat['x'] not in results:
-                ready = False
-        if ready:
-            machine = _find_machine(recipe['fromMachineType'], recipe['fromMachineLevel'])
-            if machine is None:
-                # TODO: Check on Bone Necklace, which is crafted at a level 99 machine.
-                print(f'No machine found for {text.item(item_id)}, type {recipe["fromMachineType"]}, level {recipe["fromMachineLevel"]}')
-            source = ('crafting', f'item:{machine}')
-            results[item_id].add(source)
+        machine = _find_machine(recipe['fromMachineType'], recipe['fromMachineLevel'])
+        if machine is None:
+            # TODO: Check on Bone Necklace, which is crafted at a level 99 machine.
+            print(f'No machine found for {text.item(item_id)}, type {recipe["fromMachineType"]}, level {recipe["fromMachineLevel"]}')
+        source = ('crafting', f'item:{machine}')
+        results[item_id].add(source)
+    return fire
 
-def update_recycle(results: Results) -> None:
+@cache
+def _recycle_rules() -> list[Rule]:
+    rules = []
     for recipe in DesignerConfig.Recycle:
         assert recipe['machineLevel'] < 4, f'Recycling recipe {text.item(recipe["id"])} has invalid level {recipe["machineLevel"]}'
         # Material being recycled.
-        if recipe['id'] not in results: continue
-
         source = ('recycling', f'item:{recipe["id"]}')
-        for group in recipe['backGeneratorIds']:
-            update_generator(results, source, group)
+        rules.append(Rule(gives_generators(recipe['backGeneratorIds'], source), requires_all=[recipe['id']]))
+    return rules
 
-def update_cooking(results: Results) -> None:
+@cache
+def _cooking_rules() -> list[Rule]:
+    rules = []
     for cook in DesignerConfig.Cooking:
         recipe = DesignerConfig.CookingFormula[cook['formulaId']]
         if not recipe['isActive']: continue
 
-        ready = True
-        for mat in recipe['materials']:
-            if mat not in results:
-                ready = False
-        if ready:
-            source = ('crafting', 'cooking', recipe['cookingType'])
-            results[cook['outItemId']].add(source)
+        source = ('crafting', 'cooking', recipe['cookingType'])
+        rules.append(Rule(gives_items([cook['outItemId']], source), requires_all=recipe['materials']))
+    return rules
 
-def update_restoring(results: Results) -> None:
+@cache
+def _restoring_rules() -> list[Rule]:
+    rules = []
     for recipe in DesignerConfig.Restore:
-        ready = True
-        for mat in recipe['partsItemIds']:
-            if mat not in results:
-                ready = False
-        if ready:
-            source = ('relic',)
-            results[recipe['id']].add(source)
+        source = ('relic',)
+        rules.append(Rule(gives_items([recipe['id']], source), requires_all=recipe['partsItemIds']))
+    return rules
 
-def update_ore_refining(results: Results) -> None:
+@cache
+def _ore_refining_rules() -> list[Rule]:
+    rules = []
     for recipe in DesignerConfig.Screening:
         # Material being refined.
-        if recipe['id'] not in results: continue
         source = ['ore_refining', f'item:{recipe["id"]}']
-        for gen in recipe['generatorIds']:
-            update_generator(results, source, gen)
+        rules.append(Rule(gives_generators(recipe['generatorIds'], source), requires_all=[recipe['id']]))
+    return rules
 
 @cache
 def _get_recipe_unlockers() -> dict[int, list[int]]:
@@ -104,7 +130,7 @@ def _get_recipe_unlockers() -> dict[int, list[int]]:
     #     if 86 in item['itemTag']:
     #         # Basic assembly station recipes unlocked by 'BLUEPRINT UNLOCK GROUP' script.
     #         unlockers[item['id']] = [13000004]
-    story = Story()
+    story = get_story()
     for mission_id, mission in story:
         for item in mission.get_unlocked_item_ids():
             unlockers[item].append('mission')
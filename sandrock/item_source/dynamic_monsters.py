@@ -64,6 +64,7 @@ from sandrock.common              import *
 from sandrock.lib.asset           import Bundle
 from sandrock.lib.designer_config import DesignerConfig
 from sandrock.lib.text            import text
+from sandrock.lib.text_index      import load_text_index
 from .common                      import *
 
 # Dynamic monster spawns.
@@ -74,9 +75,9 @@ def update_dynamic_monsters(results: Results) -> None:
 # Can't find the rules that spawn Scrooge McMole.
 def update_scrooge_mcmole(results: Results) -> None:
     monsters = DesignerConfig.Monster
+    name_ids = set(load_text_index().equals('scrooge mcmole'))
     for monster in monsters.values():
-        name = text(monster['nameId'])
-        if name.lower() == 'scrooge mcmole':
+        if monster['nameId'] in name_ids:
             source = ['monster', 'scene:60', f'monster:{monster["id"]}']
             for drop in monster['dropDatas']:
                 update_generator(results, source, drop['y'])
@@ -5,26 +5,32 @@ from sandrock.lib.designer_config import DesignerConfig
 from .common                      import *
 
 def update_farming(results: Results) -> None:
+    apply_rules(results, farming_rules())
+
+def update_fishing(results: Results) -> None:
+    apply_rules(results, fishing_rules())
+
+@cache
+def farming_rules() -> list[Rule]:
+    rules = []
     for crop in DesignerConfig.PlantConfig:
         seed_id = crop['ID']
-        if seed_id not in results: continue
-        
-        source = ['farming', f'item:{seed_id}']
-        groups = crop['dropDestroyIds'] + [crop['harvestId']]
-        for group in groups:
-            update_generator(results, source, group)
+        source  = ['farming', f'item:{seed_id}']
+        groups  = crop['dropDestroyIds'] + [crop['harvestId']]
+        rules.append(Rule(gives_generators(groups, source), requires_all=[seed_id]))
+    return rules
 
-def update_fishing(results: Results) -> None:
+@cache
+def fishing_rules() -> list[Rule]:
+    rules = []
     for pond in DesignerConfig.FishpondInfos:
-        source = ('fishing', 'pond', str(pond['id']))
-        for fish_id in pond['fishIds']:
-            item_id = DesignerConfig.FishInfos[fish_id]['itemId']
-            results[item_id].add(source)
+        source   = ('fishing', 'pond', str(pond['id']))
+        item_ids = [DesignerConfig.FishInfos[fish_id]['itemId'] for fish_id in pond['fishIds']]
+        rules.append(Rule(gives_items(item_ids, source)))
 
         for bait_id in pond['validBaitIds']:
-            if bait_id not in results: continue
-
-            source = ('fishing', 'bait', f'item:{bait_id}')
+            source   = ('fishing', 'bait', f'item:{bait_id}')
+            item_ids = []
             for bait in DesignerConfig.BaitInfos:
                 if bait['itemId'] != bait_id:
                     continue
@@ -33,5 +39,6 @@ def update_fishing(results: Results) -> None:
                     for fish_group_id in bait[field]:
                         fish_group = DesignerConfig.FishGroupInfos[fish_group_id]
                         for fish_id in fish_group['fishIds']:
-                            item_id = DesignerConfig.FishInfos[fish_id]['itemId']
-                            results[item_id].add(source)
+                            item_ids.append(DesignerConfig.FishInfos[fish_id]['itemId'])
+            rules.append(Rule(gives_items(item_ids, source), requires_all=[bait_id]))
+    return rules
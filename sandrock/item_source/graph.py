@@ -0,0 +1,169 @@
+'''
+The structure behind the item sources: which source produces which items, and
+which items each source needs first (a recipe's materials, a crop's seed, a
+container, a fishing bait). Built while sources are discovered, it answers
+questions that would otherwise need the whole discovery run again:
+
+  - Is an item obtainable?
+  - What is the shortest chain of sources that obtains it?
+  - What becomes unobtainable if a source is removed?
+'''
+
+from __future__ import annotations
+
+from sandrock.common import *
+from .common         import *
+
+from collections import deque
+
+# ------------------------------------------------------------------------------
+
+# One way of obtaining items: once every item in `requires_all` and, if given,
+# one item in `requires_any` is obtained, `source` gives the `outputs`.
+class Producer:
+    def __init__(
+        self,
+        source:       ItemSource,
+        requires_all: tuple[int, ...],
+        requires_any: tuple[int, ...] | None,
+        outputs:      tuple[int, ...],
+    ):
+        self.source       = source
+        self.requires_all = requires_all
+        self.requires_any = requires_any
+        self.outputs      = outputs
+
+    def __repr__(self) -> str:
+        return f'Producer({self.source}, requires_all={self.requires_all}, requires_any={self.requires_any}, outputs={self.outputs})'
+
+class AcquisitionGraph:
+    def __init__(self):
+        self.producers: list[Producer] = []
+        # Item ID to the indices of the producers that output or need it.
+        self._producers_of = defaultdict(list)
+        self._consumers_of = defaultdict(list)
+        # Reachability with every source, until another producer is added.
+        self._full_reach   = None
+
+    def add_producer(
+        self,
+        source:       ItemSource,
+        outputs:      Iterable[int],
+        requires_all: Iterable[int] = (),
+        requires_any: Iterable[int] | None = None,
+    ) -> None:
+        producer = Producer(
+            tuple(source),
+            tuple(requires_all),
+            None if requires_any is None else tuple(requires_any),
+            tuple(sorted(set(outputs))),
+        )
+        index = len(self.producers)
+        self.producers.append(producer)
+        self._full_reach = None
+
+        for item_id in producer.outputs:
+            self._producers_of[item_id].append(index)
+        for item_id in set(producer.requires_all + (producer.requires_any or ())):
+            self._consumers_of[item_id].append(index)
+
+    # Sources found without needing any other item.
+    def add_base_sources(self, results: Results) -> None:
+        items_by_source = defaultdict(list)
+        for item_id, sources in results.items():
+            for source in render_sources(sources):
+                items_by_source[source].append(item_id)
+        for source, item_ids in sorted(items_by_source.items(), key=lambda entry: str(entry[0])):
+            self.add_producer(source, item_ids)
+
+    # Outputs of a rule that fired, as `Rule.fire` wrote them to `outputs`.
+    def add_rule(self, rule: Rule, outputs: Results) -> None:
+        items_by_source = defaultdict(list)
+        for item_id, sources in outputs.items():
+            for source in sources:
+                items_by_source[source].append(item_id)
+        for source, item_ids in items_by_source.items():
+            self.add_producer(source, item_ids, rule.requires_all, rule.requires_any)
+
+    def producers_of(self, item_id: int) -> list[Producer]:
+        return [self.producers[index] for index in self._producers_of.get(item_id, ())]
+
+    def is_obtainable(self, item_id: int) -> bool:
+        return item_id in self._reach()[0]
+
+    def obtainable_items(self, without: ItemSource | None = None) -> set[int]:
+        return set(self._reach(None if without is None else tuple(without))[0])
+
+    # The producers that obtain the item soonest, in an order where each one's
+    # requirements come from producers before it. None if it can't be obtained.
+    def shortest_chain(self, item_id: int) -> list[Producer] | None:
+        obtained_by, depth = self._reach()
+        if item_id not in obtained_by:
+            return None
+
+        chain   = []
+        visited = set()
+
+        def visit(item_id: int) -> None:
+            index = obtained_by[item_id]
+            if index in visited:
+                return
+            visited.add(index)
+
+            producer = self.producers[index]
+            for required_id in producer.requires_all:
+                visit(required_id)
+            if producer.requires_any:
+                visit(min(producer.requires_any, key=lambda option: depth.get(option, float('inf'))))
+            chain.append(producer)
+
+        visit(item_id)
+        return chain
+
+    # Items that can no longer be obtained without a source. The source may be
+    # a prefix: ('fishing',) removes every fishing source.
+    def unobtainable_without(self, source: ItemSource) -> set[int]:
+        return set(self._reach()[0]) - set(self._reach(tuple(source))[0])
+
+    # Breadth-first search from the producers that need nothing, in rounds: a
+    # producer fires in the round after its last requirement is obtained.
+    # Returns, for every obtainable item, the producer that first obtained it
+    # and the round it was obtained in.
+    def _reach(self, without: ItemSource | None = None) -> tuple[dict[int, int], dict[int, int]]:
+        if without is None and self._full_reach is not None:
+            return self._full_reach
+
+        missing     = []
+        any_pending = []
+        queue       = deque()
+        for index, producer in enumerate(self.producers):
+            removed = without is not None and producer.source[:len(without)] == without
+            missing.append(float('inf') if removed else len(set(producer.requires_all)))
+            any_pending.append(producer.requires_any is not None)
+            if missing[index] == 0 and not any_pending[index]:
+                queue.append((index, 0))
+
+        obtained_by = {}
+        depth       = {}
+
+        while queue:
+            index, round_ = queue.popleft()
+            for item_id in self.producers[index].outputs:
+                if item_id in obtained_by:
+                    continue
+                obtained_by[item_id] = index
+                depth[item_id]       = round_
+
+                for consumer in self._consumers_of.get(item_id, ()):
+                    producer  = self.producers[consumer]
+                    was_ready = missing[consumer] == 0 and not any_pending[consumer]
+                    if item_id in producer.requires_all:
+                        missing[consumer] -= 1
+                    if any_pending[consumer] and item_id in producer.requires_any:
+                        any_pending[consumer] = False
+                    if not was_ready and missing[consumer] == 0 and not any_pending[consumer]:
+                        queue.append((consumer, round_ + 1))
+
+        if without is None:
+            self._full_reach = (obtained_by, depth)
+        return obtained_by, depth
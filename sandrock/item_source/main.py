@@ -4,14 +4,22 @@
 
 from sandrock.common              import *
 from sandrock.lib.designer_config import DesignerConfig
-from sandrock.preproc             import _presistent_cached
+from sandrock.lib.generator       import purge_generator_table
+from sandrock.preproc             import _get_cache_inputs, purge_caches
+from sandrock.structures.story    import reset_story
+
+from concurrent.futures import ThreadPoolExecutor
+
+import time
 
 from .common import *
+from .cache  import run_cached_pass
 
-from .craft            import update_crafting
+from .craft            import crafting_rules
 from .designer_configs import update_designer_configs
 from .dynamic_monsters import update_dynamic_monsters
-from .farm_fish        import update_farming, update_fishing
+from .farm_fish        import farming_rules, fishing_rules
+from .graph            import AcquisitionGraph
 from .missions         import update_missions
 from .scenes           import update_scenes
 from .terrain          import update_terrain
@@ -20,11 +28,26 @@ from .unlockers        import update_unlockers
 
 # ------------------------------------------------------------------------------
 
+# With purge, the caches the analysis owns (see `_purge_caches`) are rebuilt
+# first.
 def get_item_sources(purge: bool = False) -> dict[int, list[ItemSource]]:
+    if purge:
+        _purge_caches()
     results = _get_item_sources()
     return results
 
+# Which sources give which items and what each needs first, for queries like
+# `graph.shortest_chain(item_id)` or `graph.unobtainable_without(('fishing',))`.
+def get_acquisition_graph(purge: bool = False) -> AcquisitionGraph:
+    if purge:
+        _purge_caches()
+    graph = AcquisitionGraph()
+    _get_item_sources(graph)
+    return graph
+
 def get_item_unlockers(purge: bool = False) -> dict[int, list[ItemSource]]:
+    if purge:
+        _purge_caches()
     results = _get_item_unlockers()
     return results
 
@@ -36,55 +59,108 @@ def _get_item_unlockers() -> dict[int, list[list[str]]]:
     
     return results
 
-def _get_item_sources() -> dict[int, list[list[str]]]:
-    results = defaultdict(set)
+def _get_item_sources(graph: AcquisitionGraph | None = None) -> dict[int, list[list[str]]]:
+    results = TrackedResults()
     
-    print('Analyzing stores, ruins, gifts, and other sources...')
-    update_designer_configs(results)
-
-    print('Analyzing dynamic monster spawns...')
-    update_dynamic_monsters(results)
-
-    print('Analyzing logging & quarrying...')
-    update_terrain(results)
+    _run_base_passes(results)
 
-    print('Analyzing gathering, monsters, treasure chests...')
-    update_scenes(results)
-
-    print('Analyzing missions...')
-    update_missions(results)
+    # Everything found so far needs no other item.
+    if graph is not None:
+        graph.add_base_sources(results)
 
     print('Analyzing crafting, farming, fishing, and containers...')
     # These items are dependent on the availability of other items, e.g., seeds
-    # for crops or bait for fish, so we check them last and repeat until no new
-    # accessible items are found.
-    prev_total = -1
-    while len(results) > prev_total:
-        prev_total = len(results)
-
-        update_crafting(results)
-        update_farming(results)
-        update_fishing(results)
-        update_containers(results)
-        update_machine_upgrades(results)
+    # for crops or bait for fish, so we check them last. Each recipe, seed, bait
+    # and container is a rule on its input items, and is evaluated again only
+    # when one of those inputs becomes available, until no new accessible items
+    # are found.
+    rules = (
+        crafting_rules()
+        + farming_rules()
+        + fishing_rules()
+        + _container_rules()
+        + _machine_upgrade_rules()
+    )
+    rounds, evaluations = propagate(results, rules, graph)
+    print(f'Propagated {len(rules)} rules in {rounds} rounds ({evaluations} rule evaluations)')
     
     return results
 
+# Passes that find sources needing no other item. They only add to results and
+# don't read each other's, so they run side by side, each into its own results.
+# The partial results are merged in this order, which keeps the merged results
+# the same as running the passes one after another.
+#
+# Each pass is listed with what it reads besides designer configs (which are
+# recorded as it runs): preproc cache keys and asset paths. A pass whose inputs
+# haven't changed since the last run loads its results from the cache instead.
+#
+# Missions are named and told apart from events by their text, through the text
+# engine.
+_story_modules = sorted((Path(__file__).parent.parent / 'structures').rglob('*.py'))
+_text_module   = Path(__file__).parent.parent / 'lib' / 'text.py'
+
+_base_passes = [
+    ('stores, ruins, gifts, and other sources', update_designer_configs, []),
+    ('dynamic monster spawns',                 update_dynamic_monsters, ['monsterspawnasset', 'localization']),
+    ('logging & quarrying',                    update_terrain,          ['terrain_trees']),
+    ('gathering, monsters, treasure chests',   update_scenes,           ['interest_points', 'salvaging_resource_points', 'scene_names']),
+    ('missions',                               update_missions,         ['story_records', 'mission_name', 'localization', _text_module, *_story_modules]),
+]
+
+# The pass results, and the preproc caches the passes declare as inputs, with
+# the copies of them this process has loaded. Caches other analyses share, like
+# the text and wiki names, are left alone.
+def _purge_caches() -> None:
+    cache_keys = ['item_sources']
+    for _, _, inputs in _base_passes:
+        cache_keys += [input_ for input_ in inputs if isinstance(input_, str) and _get_cache_inputs(input_) is not None]
+    purge_caches(dict.fromkeys(cache_keys))
+    purge_generator_table()
+    reset_story()
+
+def _run_base_passes(results: Results) -> None:
+    print(f'Analyzing {", ".join(description for description, _, _ in _base_passes)}...')
+    with ThreadPoolExecutor(max_workers=len(_base_passes)) as executor:
+        futures = [executor.submit(_run_pass, update, inputs) for _, update, inputs in _base_passes]
+
+        for (description, _, _), future in zip(_base_passes, futures):
+            partial, seconds, cached = future.result()
+            for item_id, sources in partial.items():
+                results[item_id].update(sources)
+            print(f'  {description}: {seconds:.2f}s, {len(partial)} items{" (cached)" if cached else ""}')
+
+def _run_pass(update: Callable[[Results], None], inputs: list[PathLike]) -> tuple[Results, float, bool]:
+    start           = time.perf_counter()
+    partial, cached = run_cached_pass(update.__module__.rpartition('.')[2], update, inputs)
+    return partial, time.perf_counter() - start, cached
+
 # Do this last so we aren't using unavailable item containers.
 def update_containers(results: Results) -> None:
-    for container in DesignerConfig.ItemUse:
-        if container['id'] in results:
-            source = ['container', f'item:{container["id"]}']
-            update_generator(results, source, container['generatorGroupId'])
+    apply_rules(results, _container_rules())
 
 def update_machine_upgrades(results: Results) -> None:
+    apply_rules(results, _machine_upgrade_rules())
+
+@cache
+def _container_rules() -> list[Rule]:
+    rules = []
+    for container in DesignerConfig.ItemUse:
+        source = ['container', f'item:{container["id"]}']
+        rules.append(Rule(gives_generators([container['generatorGroupId']], source), requires_all=[container['id']]))
+    return rules
+
+@cache
+def _machine_upgrade_rules() -> list[Rule]:
     machines = DesignerConfig.Machine
     source = ('machine_upgrade',)
+    rules = []
     for machine in machines:
         if machine['level'] <= 1: continue
         # Being lazy and not checking if the upgrade materials exist in results.
         previous_level_machine = next((m for m in machines if m['tag'] == machine['tag'] and m['level'] == machine['level'] - 1), None)
-        if previous_level_machine is None or previous_level_machine['id'] not in results:
+        if previous_level_machine is None:
             continue
         if len(previous_level_machine['upgradeMaterials']) > 0:
-            results[machine['id']].add(source)
+            rules.append(Rule(gives_items([machine['id']], source), requires_all=[previous_level_machine['id']]))
+    return rules
@@ -6,7 +6,7 @@ the mission conduct.
 from sandrock.common              import *
 from sandrock.lib.asset           import Bundle
 from sandrock.lib.designer_config import DesignerConfig
-from sandrock.structures.story    import Story
+from sandrock.structures.story    import get_story
 from .common                      import *
 
 # ------------------------------------------------------------------------------
@@ -23,7 +23,7 @@ def update_rewards(results: Results) -> None:
             results[item['id']].add(source)
 
 def update_story_script(results: Results) -> None:
-    story = Story()
+    story = get_story()
     for mission_id, mission in story:
         for item_causal_event, item_ids in mission.get_received_items().items():
             for item_id in item_ids:
@@ -7,33 +7,32 @@ implemented versus what is just in the configs.
 
 from sandrock.lib.sceneinfo                import sceneinfo
 from sandrock.common              import *
-from sandrock.lib.designer_config import DesignerConfig
+from sandrock.lib.designer_config import DesignerConfig, note_reads
 from sandrock.preproc             import get_interest_points, get_catchable_resource_points
+from sandrock.preproc.interest_points import InterestPoint
 from .common                      import *
 
 # ------------------------------------------------------------------------------
 
 def update_scenes(results: Results) -> None:
-    # Get data for all the game objects we care about.
+    # Get data for all the game objects we care about. The preproc stage has
+    # already copied the behaviour fields we need into each record.
     for interest in get_interest_points():
-        # Read in JSON from the GameObject's MonoBehaviour path.
-        behav = read_json(interest['behaviour'])
-        if not behav['m_Enabled']:
+        if not interest['enabled']:
             continue
         if interest['type'] == 'MonsterArea_IMap':
-            update_monster(results, interest['scene'], behav)
+            update_monster(results, interest['scene'], interest)
         if interest['type'] == 'SpawnMono_Point':
-            update_monster(results, interest['scene'], behav)
+            update_monster(results, interest['scene'], interest)
         if interest['type'] == 'ResourceArea':
-            update_resource(results, interest['scene'], behav)
+            update_resource(results, interest['scene'], interest)
         if interest['type'] == 'SceneItemBox':
-            update_treasure(results, interest['scene'], behav)
+            update_treasure(results, interest['scene'], interest)
         if interest['type'] == 'VoxelSpawnerMarkHub':
-            update_voxel(results, interest['scene'], behav)
+            update_voxel(results, interest['scene'], interest)
 
-def update_monster(results: Results, scene: str, behaviour: Any) -> None:
-    # protoId for SpawnMono_Point, monsterId for MonsterArea_IMap.
-    monster_id = behaviour.get('protoId', behaviour.get('monsterId'))
+def update_monster(results: Results, scene: str, interest: InterestPoint) -> None:
+    monster_id = interest.get('monster_id')
     # These are the fights against Logan, but it's impossible to 
     # actually defeat him, so I do not believe he has any drops - yet, his monster 
     # data has the same drop table as the Caretaker.
@@ -46,8 +45,8 @@ def update_monster(results: Results, scene: str, behaviour: Any) -> None:
         for drop in monster['dropDatas']:
             update_generator(results, source, drop['y'])
 
-def update_resource(results: Results, scene: str, behaviour: Any) -> None:
-    resource_point_confs = [conf for conf in behaviour['weightConfigs'] if conf['weight'] > 0]
+def update_resource(results: Results, scene: str, interest: InterestPoint) -> None:
+    resource_point_confs = [conf for conf in interest['weight_configs'] if conf['weight'] > 0]
     resource_point_ids = [conf['id'] for conf in resource_point_confs if conf['id']]
 
     for resource_point_id in resource_point_ids:
@@ -75,28 +74,39 @@ def update_resource(results: Results, scene: str, behaviour: Any) -> None:
         for group in groups:
             update_generator(results, source, group)
 
-def update_treasure(results: Results, scene: str, behaviour: Any) -> None:
-    source = ['treasure', f'scene:{scene}', f'generator:{behaviour["generatorId"]}']
-    update_generator(results, source, behaviour['generatorId'])
+def update_treasure(results: Results, scene: str, interest: InterestPoint) -> None:
+    source = ['treasure', f'scene:{scene}', f'generator:{interest["generator_id"]}']
+    update_generator(results, source, interest['generator_id'])
 
-_voxel_types = {voxel['type']: voxel for voxel in DesignerConfig.VoxelTypeInfo}
-_static_scene_spawners = {scene['scene']: scene for scene in DesignerConfig.StaticSceneSpawner}
 _translate = {
     'BaseVoxel': 'baseVoxel',
 }
-def update_voxel(results: Results, scene: str, behaviour: Any) -> None:
+def update_voxel(results: Results, scene: str, interest: InterestPoint) -> None:
+    voxel_types, static_scene_spawners = _load_voxel_tables()
     scene_id = sceneinfo.scene_id(scene)
     source = ('scene', f'scene:{scene_id}', 'mining')
-    type_tag = _translate.get(behaviour['typeTag'], behaviour['typeTag'])
-    scene_voxel_data = _static_scene_spawners.get(scene_id, {})
+    type_tag = _translate.get(interest['type_tag'], interest['type_tag'])
+    scene_voxel_data = static_scene_spawners.get(scene_id, {})
 
     if not scene_voxel_data: return
 
     for type_weight in scene_voxel_data[type_tag].split(','):
         type_id = int(type_weight.split('_')[0])
-        voxel = _voxel_types[type_id]
+        voxel = voxel_types[type_id]
         update_generator(results, source, voxel['itemDropId'])
 
+# Voxel types by type, and static scene spawners by scene. Built once, but the
+# configs are counted as read on every call, so the pass's cache tracks them.
+def _load_voxel_tables() -> tuple[dict[int, dict], dict[int, dict]]:
+    note_reads('VoxelTypeInfo', 'StaticSceneSpawner')
+    return _build_voxel_tables()
+
+@cache
+def _build_voxel_tables() -> tuple[dict[int, dict], dict[int, dict]]:
+    voxel_types           = {voxel['type']: voxel for voxel in DesignerConfig.VoxelTypeInfo}
+    static_scene_spawners = {scene['scene']: scene for scene in DesignerConfig.StaticSceneSpawner}
+    return voxel_types, static_scene_spawners
+
 @cache
 def _load_catchable(key: str) -> dict | None:
     path = get_catchable_resource_points().get(key)
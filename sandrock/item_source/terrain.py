@@ -6,8 +6,10 @@ from .common                      import *
 def update_terrain(results: Results) -> None:
     trees_by_prefab = {tree['terrainTreePrefab']: tree for tree in DesignerConfig.TerrainTree}
     
-    for tree in get_terrain_trees():
-        proto = trees_by_prefab[tree['prefab']]
+    # Every tree of a prefab in a scene gives the same sources, so only the
+    # distinct pairs matter.
+    for scene, prefab in get_terrain_trees().pairs():
+        proto = trees_by_prefab[prefab]
         tree_id = proto['id']
 
         if proto['targetType'] == 1:
@@ -15,7 +17,7 @@ def update_terrain(results: Results) -> None:
         else:
             action = 'logging'
         
-        source = [action, tree['scene'], f'tree:{tree_id}']
+        source = [action, scene, f'tree:{tree_id}']
         update_generator(results, source, proto['chopTrunkDropGroupId'])
         update_generator(results, source, proto['chopStumpDropGroupId'])
 
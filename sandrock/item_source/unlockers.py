@@ -5,7 +5,7 @@ Find all the ways that the ability to craft an item can be unlocked.
 from sandrock.common              import *
 from sandrock.lib.designer_config import DesignerConfig
 from sandrock.lib.text            import text
-from sandrock.structures.story    import Story
+from sandrock.structures.story    import get_story
 from .common                      import *
 
 # ------------------------------------------------------------------------------
@@ -47,7 +47,7 @@ def update_machines(results: Results) -> None:
             results[product].add(source)
 
 def update_missions(results: Results) -> None:
-    story = Story()
+    story = get_story()
     for mission_id, mission in story:
         source = ('mission', 'script', f'mission:{mission_id}')
         for item in mission.get_unlocked_item_ids():
@@ -62,5 +62,5 @@ def update_recipe_books(results: Results) -> None:
 def update_recipe_inquiry(results: Results) -> None:
     for inquiry in DesignerConfig.InquiryDataBase:
         if len(inquiry['npcId']) > 0:
-            source = ('share_recipe', (f'npc:{npc}' for npc in inquiry['npcId']))
+            source = ('share_recipe', tuple(f'npc:{npc}' for npc in inquiry['npcId']))
             results[inquiry['para']].add(source)
@@ -4,6 +4,10 @@ from sandrock.common    import *
 from sandrock.lib.asset import Bundle
 from sandrock.preproc   import get_config_paths
 
+from contextlib import contextmanager
+
+import threading
+
 # ------------------------------------------------------------------------------
 
 # Should this be private? Only called in this file?
@@ -25,8 +29,33 @@ def load_designer_config(key: str) -> _DesignerConfigData | None:
     else:
         return (configs, configs)
 
+# Collect the keys of the designer configs read on this thread inside the block,
+# for caching something derived from them. Blocks may be nested.
+@contextmanager
+def record_reads() -> Iterator[set[str]]:
+    keys     = set()
+    previous = getattr(_recorder, 'keys', None)
+    _recorder.keys = keys
+    try:
+        yield keys
+    finally:
+        _recorder.keys = previous
+        if previous is not None:
+            previous.update(keys)
+
+# Count configs as read by code that loads them without `DesignerConfig`, or
+# from a table derived from them. A cached table shared between threads calls
+# this on every lookup, not only when it is built, so that each reader records
+# it whichever thread built it.
+def note_reads(*keys: str) -> None:
+    keys_read = getattr(_recorder, 'keys', None)
+    if keys_read is not None:
+        keys_read.update(keys)
+
 # -- Private -------------------------------------------------------------------
 
+_recorder = threading.local()
+
 def _is_unique_on_key(data: list[dict[str, Any]], key: str) -> bool:
     '''
     Check if the given key is unique across all dictionaries in the list.
@@ -46,6 +75,7 @@ _DesignerConfigData: TypeAlias = dict[int, _DesignerConfigItem] | list[_Designer
 class _DesignerConfigLoader:
     # Square bracket syntax.
     def __getitem__(self, key: str) -> _DesignerConfigWrapper:
+        note_reads(key)
         config, raw_config = load_designer_config(key)
         assert config is not None
         return _DesignerConfigWrapper(config, raw_config)
@@ -3,47 +3,105 @@ A generator is like a loot table for item drops. Game objects like resources,
 monsters, and treasure chests all use these to determine drops.
 '''
 
+from __future__ import annotations
+
 from sandrock.common              import *
-from sandrock.lib.designer_config import DesignerConfig
+from sandrock.lib.designer_config import DesignerConfig, note_reads
+from sandrock.preproc             import _presistent_cached, get_config_paths, purge_caches
 
 # ------------------------------------------------------------------------------
 
 # Get the item ids for the generators in a select group.
 def expand_generator(group_id: int) -> list[int]:
-    item_ids = set()
-    group    = DesignerConfig.GeneratorGroup[group_id]
-
-    for gen_id in _group_generator_ids(group):
-        generator = DesignerConfig.Generator_Item[gen_id]
-        if generator['randomType'] == 0 and generator['parameters'][0] <= 0:
-            continue
-        item_ids.add(generator['itemId'])
-    return sorted(item_ids)
+    table = load_generator_table()
+    if group_id in table['missing_generators']:
+        raise KeyError(table['missing_generators'][group_id])
+    return list(table['group_items'][group_id])
 
 def find_item_generators(item: dict | int) -> list[int]:
     if isinstance(item, dict):
         item = item['id']
+    return list(load_generator_table()['item_groups'].get(item, []))
 
-    gen_ids = []
-    for gen in DesignerConfig.Generator_Item:
-        if gen['itemId'] == item:
-            gen_ids.append(gen['id'])
+# Every generator group expanded to the items it can drop, and the reverse,
+# item to the groups whose generators name it. Walking the group elements for
+# each lookup is slow, so these are built once and cached until the generator
+# configs change.
+def load_generator_table() -> GeneratorTable:
+    note_reads('GeneratorGroup', 'Generator_Item')
+    return _load_generator_table()
 
-    group_ids = []
-    for group in DesignerConfig.GeneratorGroup:
-        for gen_id in _group_generator_ids(group):
-            if gen_id in gen_ids:
-                group_ids.append(group['id'])
+# Delete the cached table and forget the copy loaded by this process.
+def purge_generator_table() -> None:
+    purge_caches(['generator_table'])
+    _load_generator_table.cache_clear()
 
-    return sorted(set(group_ids))
+class GeneratorTable(TypedDict):
+    # Skips zero-weight entries and generators that never drop (a chance of 0
+    # or less), for `expand_generator`.
+    group_items:        dict[int, list[int]]
+    # Only skips generators with a chance of exactly 0, as item sources always
+    # have.
+    source_items:       dict[int, list[int]]
+    item_groups:        dict[int, list[int]]
+    # Groups whose lookups fail, as they did when the configs were walked on
+    # each lookup: the first missing generator of a group, and, for item
+    # sources, the first entry that is missing or weighted 0 or less (None).
+    missing_generators: dict[int, int]
+    source_errors:      dict[int, int | None]
 
 # -- Private -------------------------------------------------------------------
 
-def _group_generator_ids(group: dict) -> list[int]:
-    ids = []
-    for element in group['elements']:
-        for id_weight in element['idWeights']:
-            if id_weight['weight'] <= 0:
-                continue
-            ids.append(id_weight['id'])
-    return ids
+@cache
+def _load_generator_table() -> GeneratorTable:
+    config_paths = get_config_paths()['designer_config']
+    inputs       = [config_paths['GeneratorGroup'], config_paths['Generator_Item'], __file__]
+    data         = _presistent_cached('generator_table', _find_generator_table, inputs=inputs)
+    return {
+        'group_items':        {int(k): v for k, v in data['group_items'].items()},
+        'source_items':       {int(k): v for k, v in data['source_items'].items()},
+        'item_groups':        {int(k): v for k, v in data['item_groups'].items()},
+        'missing_generators': {int(k): v for k, v in data['missing_generators'].items()},
+        'source_errors':      {int(k): v for k, v in data['source_errors'].items()},
+    }
+
+def _find_generator_table() -> GeneratorTable:
+    generators         = DesignerConfig.Generator_Item
+    group_items        = {}
+    source_items       = {}
+    item_groups        = defaultdict(set)
+    missing_generators = {}
+    source_errors      = {}
+
+    for group in DesignerConfig.GeneratorGroup:
+        item_ids        = set()
+        source_item_ids = set()
+        for element in group['elements']:
+            for id_weight in element['idWeights']:
+                if id_weight['weight'] <= 0:
+                    source_errors.setdefault(group['id'], None)
+                    continue
+                generator = generators.get(id_weight['id'])
+                if generator is None:
+                    missing_generators.setdefault(group['id'], id_weight['id'])
+                    source_errors.setdefault(group['id'], id_weight['id'])
+                    continue
+                # Any generator in the group counts for the reverse index, even
+                # one that never drops.
+                item_groups[generator['itemId']].add(group['id'])
+                if generator['randomType'] == 0 and generator['parameters'][0] == 0:
+                    continue
+                source_item_ids.add(generator['itemId'])
+                if generator['randomType'] == 0 and generator['parameters'][0] < 0:
+                    continue
+                item_ids.add(generator['itemId'])
+        group_items[group['id']]  = sorted(item_ids)
+        source_items[group['id']] = sorted(source_item_ids)
+
+    return {
+        'group_items':        sorted_dict(group_items),
+        'source_items':       sorted_dict(source_items),
+        'item_groups':        sorted_dict({item_id: sorted(group_ids) for item_id, group_ids in item_groups.items()}),
+        'missing_generators': sorted_dict(missing_generators),
+        'source_errors':      sorted_dict(source_errors),
+    }
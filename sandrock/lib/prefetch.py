@@ -0,0 +1,85 @@
+'''
+Read files ahead of the code that processes them.
+
+Sweeps over a scene read thousands of small behaviour files one at a time, and
+with a cold file cache most of their time is spent waiting on each read. Here
+the next few loads run on a thread pool while the current item is processed,
+and items still come out in their original order.
+'''
+
+from __future__ import annotations
+
+from sandrock.common import *
+
+from collections        import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import time
+
+# ------------------------------------------------------------------------------
+
+# Yield (item, load(item)) for each item, in order, with up to `depth` loads in
+# flight ahead of the consumer.
+def prefetched(
+    items: Iterable[T],
+    load:  Callable[[T], R],
+    depth: int | None = None,
+    stats: PrefetchStats | None = None,
+) -> Iterator[tuple[T, R]]:
+    depth = depth or config.prefetch_depth
+    stats = stats if stats is not None else PrefetchStats(depth)
+    items = iter(items)
+
+    with ThreadPoolExecutor(max_workers=depth) as executor:
+        pending: deque[tuple[T, Future]] = deque()
+
+        def submit_next() -> None:
+            for item in items:
+                pending.append((item, executor.submit(load, item)))
+                return
+
+        try:
+            for _ in range(depth):
+                submit_next()
+
+            while pending:
+                # Queue depth: loads already finished when the consumer asks.
+                stats.ready_total += sum(future.done() for _, future in pending)
+
+                item, future = pending.popleft()
+                if not future.done():
+                    start              = time.perf_counter()
+                    result             = future.result()
+                    stats.stall_time  += time.perf_counter() - start
+                    stats.stalls      += 1
+                else:
+                    result = future.result()
+
+                stats.count += 1
+                submit_next()
+                yield item, result
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+class PrefetchStats:
+    def __init__(self, depth: int):
+        self.depth       = depth
+        self.count       = 0
+        self.stalls      = 0
+        self.stall_time  = 0.0
+        self.ready_total = 0
+
+    # Average number of finished loads waiting when the consumer asked for the
+    # next item. Close to `depth` means reads are well ahead of processing.
+    @property
+    def mean_ready(self) -> float:
+        return self.ready_total / self.count if self.count else 0.0
+
+    def __str__(self) -> str:
+        return f'{self.count} reads, {self.stalls} stalls ({self.stall_time:.2f}s), queue depth {self.mean_ready:.1f}/{self.depth}'
+
+# -- Private -------------------------------------------------------------------
+
+T = TypeVar('T')
+R = TypeVar('R')
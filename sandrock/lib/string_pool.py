@@ -0,0 +1,143 @@
+'''
+A compact, read-only mapping of integer IDs to strings, for tables with hundreds
+of thousands of entries like the localization text.
+
+Instead of one Python string per entry, a pool holds a sorted ID array, one
+UTF-8 blob and an array of offsets into it, and decodes a string only when it
+is looked up. A pool can be saved to a single file and memory-mapped back, so a
+cached pool costs next to nothing to open and its pages are shared with the OS
+file cache rather than copied into each process.
+'''
+
+from __future__ import annotations
+
+from sandrock.common import *
+
+from array           import array
+from bisect          import bisect_left
+from collections.abc import Mapping
+
+import mmap
+import os
+import struct
+
+# ------------------------------------------------------------------------------
+
+class StringPool(Mapping):
+    def __init__(self, ids: Any, offsets: Any, blob: Any, buffer: mmap.mmap | None = None):
+        # Sorted text IDs, and len(ids) + 1 offsets so that string i is
+        # blob[offsets[i]:offsets[i + 1]].
+        self._ids     = ids
+        self._offsets = offsets
+        self._blob    = blob
+        # The memory map backing the arrays above, if any; kept open for as long
+        # as the pool is alive.
+        self._buffer  = buffer
+
+    @classmethod
+    def from_dict(cls, strings: dict[int, str]) -> StringPool:
+        ids     = array('q')
+        offsets = array('Q', [0])
+        parts   = []
+        end     = 0
+
+        for id_ in sorted(strings):
+            encoded = strings[id_].encode('utf-8')
+            end    += len(encoded)
+            ids.append(id_)
+            offsets.append(end)
+            parts.append(encoded)
+
+        return cls(ids, offsets, b''.join(parts))
+
+    # Open a pool saved with `save`. Returns None if the file is missing, is not
+    # a pool, or was saved under a different key.
+    @classmethod
+    def load(cls, path: PathLike, key: str) -> StringPool | None:
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_header.size)
+                if len(header) < _header.size:
+                    return None
+                magic, saved_key, count, blob_size = _header.unpack(header)
+                if magic != _magic or saved_key != _encode_key(key):
+                    return None
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+
+        view         = memoryview(buffer)
+        ids_start    = _header.size
+        offset_start = ids_start + count * 8
+        blob_start   = offset_start + (count + 1) * 8
+
+        ids     = view[ids_start:offset_start].cast('q')
+        offsets = view[offset_start:blob_start].cast('Q')
+        blob    = view[blob_start:blob_start + blob_size]
+        return cls(ids, offsets, blob, buffer)
+
+    def save(self, path: PathLike, key: str) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write beside the target and swap it in, so a reader never maps a
+        # half-written pool.
+        temp_path = path.with_name(path.name + '.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(_header.pack(_magic, _encode_key(key), len(self._ids), len(self._blob)))
+            f.write(array('q', self._ids).tobytes())
+            f.write(array('Q', self._offsets).tobytes())
+            f.write(self._blob)
+        os.replace(temp_path, path)
+
+    def __getitem__(self, id_: int) -> str:
+        index = self._index(id_)
+        if index < 0:
+            raise KeyError(id_)
+        return self._decode(index)
+
+    # Overridden so a miss does not cost a raised and caught KeyError.
+    def get(self, id_: int, default: Any = None) -> str | Any:
+        index = self._index(id_)
+        if index < 0:
+            return default
+        return self._decode(index)
+
+    def __contains__(self, id_: object) -> bool:
+        return self._index(id_) >= 0
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def items(self) -> Iterator[tuple[int, str]]:
+        for index, id_ in enumerate(self._ids):
+            yield id_, self._decode(index)
+
+    def values(self) -> Iterator[str]:
+        for index in range(len(self._ids)):
+            yield self._decode(index)
+
+    def _decode(self, index: int) -> str:
+        start = self._offsets[index]
+        end   = self._offsets[index + 1]
+        return str(self._blob[start:end], 'utf-8')
+
+    def _index(self, id_: object) -> int:
+        if not isinstance(id_, int):
+            return -1
+        index = bisect_left(self._ids, id_)
+        if index < len(self._ids) and self._ids[index] == id_:
+            return index
+        return -1
+
+# -- Private -------------------------------------------------------------------
+
+# Magic, key (a 40 character hex digest), string count, blob size in bytes.
+_magic  = b'SRPOOL01'
+_header = struct.Struct('<8s40sQQ')
+
+def _encode_key(key: str) -> bytes:
+    return key.encode('ascii').ljust(40, b'\0')[:40]
@@ -1,6 +1,11 @@
 from sandrock.common              import *
-from sandrock.lib.designer_config import DesignerConfig
-from sandrock.preproc             import get_config_paths
+from sandrock.lib.designer_config import DesignerConfig, note_reads
+from sandrock.lib.string_pool     import StringPool
+from sandrock.preproc             import _presistent_cached, fingerprint_paths, get_config_paths
+
+from collections.abc import Mapping
+
+import hashlib
 
 # ------------------------------------------------------------------------------
 
@@ -56,17 +61,52 @@ def _substitute(string: str) -> str:
 
 # ------------------------------------------------------------------------------
 
+# Each language has hundreds of thousands of entries, so by default a table is
+# held as a compact string pool, memory-mapped from the cache after the first
+# load. Set `config.text_backend = 'dict'` to get plain dictionaries instead.
 @cache
-def load_text(language: str) -> dict[int, str]:
+def load_text(language: str) -> Mapping[int, str]:
     config_paths = get_config_paths()
     path         = config_paths['text'][language]
-    data         = read_json(path)
-    texts        = {config['id']: config['text'] for config in data['configList']}
+
+    if config.text_backend == 'pool':
+        return _load_text_pool(language, path)
+    return _read_text(path)
+
+def _read_text(path: PathLike) -> dict[int, str]:
+    data  = read_json(path)
+    texts = {config['id']: config['text'] for config in data['configList']}
 
     return sorted_dict(texts)
 
+# A key that changes whenever a language's text file does, for caches derived
+# from the text table.
+def text_source_key(language: str) -> str:
+    path = get_config_paths()['text'][language]
+    return hashlib.sha1(repr((config.version, fingerprint_paths([path]))).encode('utf-8')).hexdigest()
+
+def _load_text_pool(language: str, path: PathLike) -> StringPool:
+    pool_path = config.cache_root / f'text_{language}.pool'
+    key       = text_source_key(language)
+
+    pool = StringPool.load(pool_path, key)
+    if pool is None:
+        StringPool.from_dict(_read_text(path)).save(pool_path, key)
+        pool = StringPool.load(pool_path, key)
+    return pool
+
+# Resolving unique names walks every item and prints the same warnings on each
+# run, so the result is cached until one of its inputs changes.
+def load_wiki_names() -> dict[int, str]:
+    note_reads(*_wiki_names_configs)
+    return _load_wiki_names()
+
 @cache
-def load_wiki_names() -> dict[str, int]:
+def _load_wiki_names() -> dict[int, str]:
+    data = _presistent_cached('wiki_names', _find_wiki_names, fingerprint=_wiki_names_fingerprint())
+    return {int(k): v for k, v in data.items()}
+
+def _find_wiki_names() -> dict[int, str]:
     items         = DesignerConfig.ItemPrototype
     name_to_items = defaultdict(list)
     result        = {}
@@ -125,6 +165,20 @@ def load_wiki_names() -> dict[str, int]:
     
     return result
 
+# Item names depend on the item and NPC clothing configs, the NPC configs used to
+# name clothing variants, the text itself, the manual tables and the heuristics
+# in this file.
+_wiki_names_configs = ['ItemPrototype', 'NpcClothItem', 'Npc', 'RandomNPCData']
+
+def _wiki_names_fingerprint() -> str:
+    config_paths = get_config_paths()
+    paths        = [config_paths['designer_config'][key] for key in _wiki_names_configs]
+    paths       += [config_paths['text'][lang] for lang in config.languages]
+    paths       += [__file__]
+
+    tables = (_priori, _misspellings, _non_standard_variant_names)
+    return hashlib.sha1(repr((fingerprint_paths(paths), tables)).encode('utf-8')).hexdigest()
+
 # ------------------------------------------------------------------------------
 
 class _TextEngine:
@@ -0,0 +1,110 @@
+'''
+An inverted index over the localization text, for finding text IDs without
+scanning every string.
+
+Each text is split into lowercase word tokens (CJK characters count as one token
+each), and every token maps to the sorted IDs of the texts that contain it. The
+index is built once per language and cached on disk until the text file changes.
+'''
+
+from __future__ import annotations
+
+from sandrock.common   import *
+from sandrock.lib.text import load_text, text_source_key
+from sandrock.preproc  import _presistent_cached
+
+from bisect import bisect_left
+
+# ------------------------------------------------------------------------------
+
+@cache
+def load_text_index(language: str | None = None) -> TextIndex:
+    language    = language or config.wiki_language
+    fingerprint = text_source_key(language) + _tokenizer_version
+    postings    = _presistent_cached(f'text_index_{language}', lambda: _find_postings(language), fingerprint=fingerprint)
+    return TextIndex(language, postings)
+
+def tokenize(string: str) -> list[str]:
+    return _token_pattern.findall(string.lower())
+
+class TextIndex:
+    def __init__(self, language: str, postings: dict[str, list[int]]):
+        self.language  = language
+        self._postings = postings
+        self._tokens   = sorted(postings)
+
+    # Texts containing the word. A query of several words is a phrase search.
+    def exact(self, word: str) -> list[int]:
+        tokens = tokenize(word)
+        if len(tokens) == 1:
+            return list(self._postings.get(tokens[0], []))
+        return self.phrase(word)
+
+    # Texts containing a word that starts with the prefix.
+    def prefix(self, prefix: str) -> list[int]:
+        prefix = prefix.lower()
+        ids    = set()
+        start  = bisect_left(self._tokens, prefix)
+
+        for token in self._tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            ids.update(self._postings[token])
+        return sorted(ids)
+
+    # Texts containing the words of the phrase consecutively and in order.
+    def phrase(self, phrase: str) -> list[int]:
+        tokens = tokenize(phrase)
+        if not tokens:
+            return []
+
+        candidates = self._intersect(tokens)
+        if len(tokens) == 1:
+            return candidates
+
+        texts = load_text(self.language)
+        return [id for id in candidates if _contains_run(tokenize(texts[id]), tokens)]
+
+    # Texts that are exactly the string, ignoring case and surrounding space;
+    # for matching names.
+    def equals(self, string: str) -> list[int]:
+        target = string.strip().lower()
+        texts  = load_text(self.language)
+        return [id for id in self._intersect(tokenize(string)) if texts[id].strip().lower() == target]
+
+    def _intersect(self, tokens: list[str]) -> list[int]:
+        postings = sorted((self._postings.get(token, []) for token in set(tokens)), key=len)
+        if not postings:
+            return []
+
+        ids = set(postings[0])
+        for posting in postings[1:]:
+            ids.intersection_update(posting)
+            if not ids:
+                break
+        return sorted(ids)
+
+# -- Private -------------------------------------------------------------------
+
+# Bump when tokenization changes, to invalidate cached indexes.
+_tokenizer_version = ':1'
+
+_cjk           = '぀-ヿ㐀-䶿一-鿿豈-﫿'
+_token_pattern = re.compile(f'[{_cjk}]|[^\\W{_cjk}]+')
+
+def _find_postings(language: str) -> dict[str, list[int]]:
+    postings = defaultdict(list)
+
+    # Text IDs come in ascending order, so each list is built sorted.
+    for id, string in load_text(language).items():
+        for token in dict.fromkeys(tokenize(string)):
+            postings[token].append(id)
+
+    return dict(postings)
+
+def _contains_run(tokens: list[str], run: list[str]) -> bool:
+    first = run[0]
+    for i, token in enumerate(tokens[:len(tokens) - len(run) + 1]):
+        if token == first and tokens[i:i + len(run)] == run:
+            return True
+    return False
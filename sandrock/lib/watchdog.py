@@ -0,0 +1,169 @@
+'''
+Run tasks in worker processes, each under a time budget.
+
+A process pool can't stop one task that runs forever without stopping the whole
+pool. Here each worker process has its own pipe, for its tasks and their
+results, so the parent always knows which item a worker is on and since when. A
+worker that goes over the budget is terminated, its item is reported as timed
+out, and a new worker with a new pipe takes its place for the remaining items.
+Nothing is shared between workers, so terminating one can't leave a shared
+queue broken for the others.
+'''
+
+from __future__ import annotations
+
+from sandrock.common import *
+
+from collections     import deque
+from multiprocessing import connection
+
+import multiprocessing
+import time
+
+# ------------------------------------------------------------------------------
+
+# Yield an outcome for each item, in the order they finish. `run` and `initialize`
+# are sent to the workers, so they must be picklable module-level functions.
+# `initialize` runs once per worker before its first task and doesn't count
+# against any task's budget.
+def run_with_budget(
+    items:      Iterable[T],
+    run:        Callable[[T], R],
+    budget:     float,
+    workers:    int | None = None,
+    initialize: Callable[[], None] | None = None,
+) -> Iterator[TaskOutcome]:
+    items   = list(items)
+    workers = min(workers or multiprocessing.cpu_count(), len(items))
+    pending = deque(range(len(items)))
+    # Worker slot to its process and pipe, and the task it is on with the time
+    # it started, if any. Pipes are left out of `readers` once they close.
+    slots   = [None] * workers
+    current = [None] * workers
+    readers = {}
+
+    def start_worker(slot: int) -> None:
+        pipe, worker_pipe = multiprocessing.Pipe()
+        process           = multiprocessing.Process(target=_work, args=(run, initialize, worker_pipe))
+        process.start()
+        # Only the worker's copy is left open, so its exit reads as the end of
+        # the pipe.
+        worker_pipe.close()
+        slots[slot]   = (process, pipe)
+        readers[pipe] = slot
+        assign(slot)
+
+    def assign(slot: int) -> None:
+        _, pipe = slots[slot]
+        if pending:
+            index         = pending.popleft()
+            current[slot] = (index, None)
+            task          = (index, items[index])
+        else:
+            current[slot] = None
+            task          = None
+        # A worker that already died is found by the checks below.
+        try:
+            pipe.send(task)
+        except OSError:
+            pass
+
+    def stop_worker(slot: int) -> None:
+        process, pipe = slots[slot]
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        readers.pop(pipe, None)
+        pipe.close()
+
+    try:
+        for slot in range(workers):
+            start_worker(slot)
+
+        remaining = len(items)
+        while remaining:
+            for pipe in connection.wait(list(readers), timeout=min(budget, 0.5)):
+                slot = readers[pipe]
+                try:
+                    kind, index, *payload = pipe.recv()
+                except (EOFError, OSError):
+                    # The worker exited; if it was on a task, it is reported
+                    # as crashed below.
+                    readers.pop(pipe)
+                    slots[slot][0].join()
+                    continue
+
+                if kind == 'start':
+                    current[slot] = (index, time.perf_counter())
+                else:
+                    status, value, seconds = payload
+                    remaining -= 1
+                    assign(slot)
+                    yield _outcome(items[index], status, value, seconds)
+
+            # Stop workers that are over budget or that died without reporting.
+            for slot, (process, _) in enumerate(slots):
+                if current[slot] is None:
+                    continue
+                index, started = current[slot]
+                elapsed        = time.perf_counter() - started if started is not None else 0.0
+
+                if elapsed > budget:
+                    status, error = 'timed out', f'over the {budget:g}s budget'
+                elif not process.is_alive():
+                    status, error = 'crashed', f'worker exited with code {process.exitcode}'
+                else:
+                    continue
+
+                stop_worker(slot)
+                remaining -= 1
+                yield _outcome(items[index], status, error, elapsed)
+                start_worker(slot)
+    finally:
+        for slot, worker in enumerate(slots):
+            if worker is not None:
+                stop_worker(slot)
+
+class TaskOutcome(TypedDict):
+    item:    Any
+    # 'done', 'failed' (raised an exception), 'timed out' or 'crashed'.
+    status:  str
+    result:  Any
+    error:   str | None
+    seconds: float
+
+# -- Private -------------------------------------------------------------------
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+def _outcome(item: Any, status: str, value: Any, seconds: float) -> TaskOutcome:
+    done = status == 'done'
+    return {
+        'item':    item,
+        'status':  status,
+        'result':  value if done else None,
+        'error':   None if done else value,
+        'seconds': seconds,
+    }
+
+# The worker loop; a None task means there is nothing left to do.
+def _work(
+    run:        Callable[[Any], Any],
+    initialize: Callable[[], None] | None,
+    pipe:       connection.Connection,
+) -> None:
+    if initialize is not None:
+        initialize()
+
+    while (task := pipe.recv()) is not None:
+        index, item = task
+        pipe.send(('start', index))
+        start = time.perf_counter()
+        try:
+            value  = run(item)
+            status = 'done'
+        except Exception as e:
+            value  = f'{type(e).__name__}: {e}'
+            status = 'failed'
+        pipe.send(('end', index, status, value, time.perf_counter() - start))
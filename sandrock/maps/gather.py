@@ -193,24 +193,20 @@ def get_gathering_points():
         if interest['type'] != 'ResourceArea':
             continue
 
-        behav = read_json(interest['behaviour'])
-        trans = read_asset_dump(interest['transform'])
-        scene_area = read_json(interest['scene_area'])
-
-        if not behav or not trans or not scene_area:
+        if 'scene_area_points' not in interest:
             print(f'Skipping {interest}')
             continue
 
         positions = []
-        for pos_rot in scene_area['points']:
+        for pos in interest['scene_area_points']:
             positions.append([
-                trans['m_LocalPosition']['x'] + pos_rot['pos']['x'],
-                trans['m_LocalPosition']['z'] + pos_rot['pos']['z'],
+                interest['position']['x'] + pos['x'],
+                interest['position']['z'] + pos['z'],
             ])
 
-        res_ids = [conf['id'] for conf in behav['weightConfigs'] if conf['weight'] > 0]
+        res_ids = [conf['id'] for conf in interest['weight_configs'] if conf['weight'] > 0]
 
-        for res_config in behav['weightConfigs']:
+        for res_config in interest['weight_configs']:
             if res_config['weight'] <= 0:
                 continue
             res = DesignerConfig.ResourcePoint.get(res_config['id'])
@@ -222,7 +218,7 @@ def get_gathering_points():
                 continue
             # Herbs with Cactus Flower fails this check.
             # if res_config['id'] == 3037: print('Sad')
-            if behav['maxCount'] == 0:
+            if interest['max_count'] == 0:
                 continue
 
             for pos in positions:
@@ -12,17 +12,11 @@ def find_tree_config(prefab):
 
 def main():
     terrain_trees = get_terrain_trees()
-    trees = []
+    summer = terrain_trees.scene_mask('main.summer')
+    prefabs = [prefab for prefab in terrain_trees.prefabs_in(summer) if find_tree_config(prefab)['targetType'] == 1]
 
-    for terrain_tree in terrain_trees:
-        if terrain_tree['scene'] != 'main.summer':
-            continue
-
-        tree_config = find_tree_config(terrain_tree['prefab'])
-        if tree_config['targetType'] != 1:
-            continue
-
-        trees.append(terrain_tree)
+    mask = summer & terrain_trees.prefab_mask(*prefabs)
+    trees = terrain_trees.records(mask)
 
     points = merge_trees(trees)
     points = sorted(points, key=(lambda point: point['category']))
@@ -1,8 +1,8 @@
 # FIXME
 
 from sandrock import *
-from sandrock.lib import preproc
-from sandrock.lib.generator import get_generator_group_items
+from sandrock import preproc
+from sandrock.lib.generator import expand_generator
 
 from functools import cache
 
@@ -43,39 +43,35 @@ def main():
 
         #print(interest)
 
-        behav = read_json(interest['behaviour'])
-        trans = read_json(interest['transform'])
-
-        if behav['generatorId'] == 20930031:
+        if interest['generator_id'] == 20930031:
             print(interest)
-            print(behav)
             print()
             continue
 
-        if not behav['m_Enabled']:
+        if not interest['enabled']:
             continue
 
-        x = trans['m_LocalPosition']['x']
-        y = trans['m_LocalPosition']['z']
+        x = interest['position']['x']
+        y = interest['position']['z']
 
         marker = {
             'categoryId': 'default',
             'position': [x, y],
             'popup': {
                 'title': 'Treasure Chest',
-                'description': '{{generator|' + str(behav['generatorId']) + '}}'
+                'description': '{{generator|' + str(interest['generator_id']) + '}}'
             },
         }
 
-        gid = behav['generatorId']
-        items = get_generator_group_items(gid)
+        gid = interest['generator_id']
+        items = expand_generator(gid)
 
         if abs(x - 88.279) < 1 and abs(y - 130.07) < 1:
             if len(items) > 1:
                 continue
             #print(x, y)
             #print('\n'.join(wiki.item(item) for item in items))
-            #print(behav)
+            #print(interest)
 
         item = wiki.item(items[0])
 
@@ -86,7 +82,7 @@ def main():
 
         if len(items) > 1:
             title = 'Treasure chest'
-            desc = '{{generator|' + str(behav['generatorId']) + '}}'
+            desc = '{{generator|' + str(interest['generator_id']) + '}}'
 
             #print(gid)
             #print([wiki.item(i) for i in items])
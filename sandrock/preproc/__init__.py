@@ -2,17 +2,45 @@ from __future__ import annotations
 
 from sandrock.common import *
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import hashlib
+import os
+import pickle
+import shutil
+import stat
+import threading
+import time
+
 # If we are enforcing types.
 if TYPE_CHECKING:
     from .configs         import _FindConfigsResult
     from .interest_points import InterestPoint
-    from .terrain_tree    import TerrainTree
+    from .sceneinfo       import SceneNames
+    from .story_script    import MissionRecord, StoryHeader
+    from .terrain_tree    import TerrainTrees
 
 # ------------------------------------------------------------------------------
 
 # T for type.
 T = TypeVar('T')
 
+# The asset directories or files each cache is computed from, relative to the
+# assets root, plus the module that computes it. A cache with declared inputs is
+# rebuilt whenever their fingerprint (see `fingerprint_paths`) changes, e.g.
+# after a re-export or a change to what the module extracts.
+_preproc_dir = Path(__file__).parent
+
+_cache_inputs: dict[str, list[PathLike]] = {
+    'config_path':               ['designer_config', 'localization', _preproc_dir / 'configs.py'],
+    'salvaging_resource_points': ['resourcepoint', _preproc_dir / 'catchable_resource.py'],
+    'mission_name':              ['story_script', _preproc_dir / 'mission.py'],
+    'story_script':              ['story_script', _preproc_dir / 'story_script.py'],
+    'story_headers':             ['story_script', _preproc_dir / 'story_script.py'],
+    'story_records':             ['story_script', _preproc_dir / 'story_script.py'],
+    'scene_names':               ['sceneinfo', 'designer_config', _preproc_dir / 'sceneinfo.py'],
+}
+
 @cache
 def get_config_paths() -> _FindConfigsResult:
     from .configs import find_configs
@@ -20,18 +48,30 @@ def get_config_paths() -> _FindConfigsResult:
 
 @cache
 def get_interest_points() -> list[InterestPoint]:
-    from .interest_points import find_interest_points
-    return _presistent_cached('interest_points', find_interest_points)
+    return _get_sharded('interest_points')
 
 @cache
 def get_catchable_resource_points() -> dict[str, str]:
     from .catchable_resource import find_catchable_resource_points
     return _presistent_cached('salvaging_resource_points', find_catchable_resource_points)
 
+# The per-scene shards are combined into memory-mapped columns, which are reused
+# for as long as every shard's fingerprint is unchanged.
 @cache
-def get_terrain_trees() -> list[TerrainTree]:
-    from .terrain_tree import find_terrain_trees
-    return _presistent_cached('terrain_trees', find_terrain_trees)
+def get_terrain_trees() -> TerrainTrees:
+    from .terrain_tree import TerrainTrees
+
+    columns_path = config.cache_root / 'terrain_trees.columns'
+    shard_keys   = [f'terrain_trees/{shard}' for shard in _list_shards('terrain_trees')]
+    fingerprint  = hashlib.sha1(repr([(key, _cache_fingerprint(key)) for key in shard_keys]).encode('utf-8')).hexdigest()
+
+    trees = TerrainTrees.load(columns_path, fingerprint)
+    if trees is None:
+        TerrainTrees.from_records(_get_sharded('terrain_trees')).save(columns_path, fingerprint)
+        trees = TerrainTrees.load(columns_path, fingerprint)
+    if trees is None:
+        raise RuntimeError(f'Terrain trees saved to {columns_path} could not be loaded back')
+    return trees
 
 @cache
 def get_mission_names() -> dict[int, str | int]:
@@ -39,27 +79,346 @@ def get_mission_names() -> dict[int, str | int]:
     data = _presistent_cached('mission_name', find_mission_names)
     return {int(k): v for k, v in data.items()}
 
+# Script ID to the root element of the script's XML, URL-decoded. Shared by every
+# reader of the story in this process, so treat the elements as read-only.
+@cache
+def get_story_script() -> dict[int, ElementTree.Element]:
+    from .story_script import find_story_script, to_element
+    data = _presistent_cached('story_script', find_story_script)
+    return {int(k): to_element(v) for k, v in data.items()}
+
+# Root attributes and RUN MISSION children of every script, without parsing the
+# rest of the XML.
+@cache
+def get_story_headers() -> dict[int, StoryHeader]:
+    from .story_script import find_story_headers
+    data = _presistent_cached('story_headers', find_story_headers)
+    return {int(k): v for k, v in data.items()}
+
+# One script's root element, URL-decoded, for reading the story a mission at a
+# time. Taken from the shared corpus if this process has already loaded it.
+def load_story_script(script_id: int) -> ElementTree.Element:
+    if get_story_script.cache_info().currsize:
+        return get_story_script()[script_id]
+    from .story_script import read_story_script
+    return read_story_script(get_story_headers()[script_id]['path'])
+
+# Every mission script as a record for the story structures, built from the
+# shared corpus; see sandrock/preproc/story_script.py. Records aren't JSON, so
+# they are pickled.
+@cache
+def get_story_records() -> dict[int, MissionRecord]:
+    from .story_script import find_story_records
+    return _pickle_cached('story_records', lambda: find_story_records(get_story_script()))
+
+# One mission's record, for reading the story a mission at a time.
+def load_mission_record(script_id: int) -> MissionRecord:
+    if get_story_records.cache_info().currsize:
+        return get_story_records()[script_id]
+    from .story_script import read_mission_record
+    return read_mission_record(get_story_headers()[script_id]['path'])
+
+@cache
+def get_scene_names() -> SceneNames:
+    from .sceneinfo import find_scene_names
+    data = _presistent_cached('scene_names', find_scene_names)
+    return {
+        'system_name_to_id': data['system_name_to_id'],
+        'normalized_to_id':  data['normalized_to_id'],
+        'id_to_system_name': {int(k): v for k, v in data['id_to_system_name'].items()},
+        'id_to_name_id':     {int(k): v for k, v in data['id_to_name_id'].items()},
+    }
+
+# -- Sharded caches ------------------------------------------------------------
+
+# Caches built by sweeping every scene are kept as one shard per scene directory,
+# each with its own inputs, so re-exporting one scene bundle rebuilds only that
+# scene. Shards are named '<kind>.<directory name>' and cached under keys like
+# 'interest_points/scene.main' or 'terrain_trees/season.main.summer'.
+_shard_roots = {
+    'scene':  'scene/additive',
+    'season': 'season',
+}
+
+# Cache group: the kinds of directory it sweeps, in order, and the module that
+# computes one shard.
+_sharded_caches = {
+    'interest_points': (['scene'],           'interest_points.py'),
+    'terrain_trees':   (['scene', 'season'], 'terrain_tree.py'),
+}
+
+def _get_sharded(group: str) -> list[Any]:
+    items = []
+    for shard in _list_shards(group):
+        items += _get_shard(group, shard)
+    return items
+
+def _get_shard(group: str, shard: str) -> list[Any]:
+    if group == 'interest_points':
+        from .interest_points import _find_scene_interests as find_shard
+    else:
+        from .terrain_tree import find_scene_trees as find_shard
+    return _presistent_cached(f'{group}/{shard}', lambda: find_shard(_shard_dir(shard)))
+
+def _list_shards(group: str) -> list[str]:
+    shards = []
+    for kind in _sharded_caches[group][0]:
+        root    = config.assets_root / _shard_roots[kind]
+        shards += [f'{kind}.{path.name}' for path in sorted(root.iterdir()) if path.is_dir()]
+    return shards
+
+def _shard_dir(shard: str) -> Path:
+    kind, _, name = shard.partition('.')
+    return config.assets_root / _shard_roots[kind] / name
+
+# ------------------------------------------------------------------------------
+
 _Func: TypeAlias = Callable[[], T]
 
-def presistent_cached(cache_key: str) -> Callable[[_Func], _Func]:
+def presistent_cached(cache_key: str, inputs: Iterable[PathLike] | None = None) -> Callable[[_Func], _Func]:
     def decorator(func: _Func) -> _Func:
         def decorated_func() -> T:
-            return _presistent_cached(cache_key, func)
+            return _presistent_cached(cache_key, func, inputs=inputs)
         return decorated_func
     return decorator
 
-def _presistent_cached(cache_key: str, func: Callable[[], T], purge: bool = False) -> T:
-    cache_path = config.cache_root / f'{cache_key}.json'
+# A cheap fingerprint of asset inputs, from sizes and modification times rather
+# than contents. A file contributes its own stat. A directory contributes its
+# mtime and, for every bundle beneath it, the stat of the bundle's assets.xml
+# manifest, which is rewritten whenever the bundle is exported.
+def fingerprint_paths(paths: Iterable[PathLike]) -> str:
+    digest = hashlib.sha1()
+    for path in paths:
+        path = Path(path)
+        if not path.is_absolute():
+            path = config.assets_root / path
+        for entry in _stat_inputs(path):
+            digest.update(repr(entry).encode('utf-8'))
+    return digest.hexdigest()
+
+def _stat_inputs(path: Path) -> Iterator[tuple]:
+    try:
+        path_stat = path.stat()
+    except OSError:
+        yield (str(path), None)
+        return
+
+    if not stat.S_ISDIR(path_stat.st_mode):
+        yield (str(path), path_stat.st_size, path_stat.st_mtime_ns)
+        return
+
+    yield (str(path), path_stat.st_mtime_ns)
+
+    manifest  = path / 'assets.xml'
+    is_bundle = manifest.exists()
+    if is_bundle:
+        yield from _stat_inputs(manifest)
+
+    # Look for bundles in subdirectories. Within a bundle only nested bundles
+    # are followed, not the type folders that hold thousands of files each.
+    for child in sorted(os.scandir(path), key=lambda entry: entry.name):
+        if child.is_dir() and (not is_bundle or os.path.exists(os.path.join(child.path, 'assets.xml'))):
+            yield from _stat_inputs(Path(child.path))
+
+# A cache is valid for the current version and, if a fingerprint is given or the
+# key has declared inputs, only while the data it was computed from hashes to the
+# same fingerprint.
+def _presistent_cached(
+    cache_key:   str,
+    func:        Callable[[], T],
+    purge:       bool = False,
+    fingerprint: str | None = None,
+    inputs:      Iterable[PathLike] | None = None,
+) -> T:
+    cache_path  = _cache_path(cache_key)
+    fingerprint = _cache_fingerprint(cache_key, fingerprint, inputs)
 
     if not purge:
         try:
             cache = read_json(cache_path)
-            if cache['version'] == config.version:
+            if _is_valid(cache, fingerprint):
                 return cache['data']
         except Exception:
             pass
 
     data = func()
     cache = {'version': config.version, 'data': data}
-    write_json(cache_path, cache)
+    if fingerprint is not None:
+        cache['fingerprint'] = fingerprint
+    _write_cache(cache_path, cache)
     return data
+
+# Like `_presistent_cached`, for data that JSON can't hold or that is too slow to
+# rebuild from JSON. The header (version and fingerprint) is pickled ahead of the
+# data, so it can be checked without loading the data.
+def _pickle_cached(cache_key: str, func: Callable[[], T], purge: bool = False) -> T:
+    cache_path  = _pickle_cache_path(cache_key)
+    fingerprint = _cache_fingerprint(cache_key)
+
+    if not purge:
+        try:
+            with open(cache_path, 'rb') as f:
+                if _is_valid(pickle.load(f), fingerprint):
+                    return pickle.load(f)
+        except Exception:
+            pass
+
+    data = func()
+    _write_pickle_cache(cache_path, {'version': config.version, 'fingerprint': fingerprint}, data)
+    return data
+
+# ------------------------------------------------------------------------------
+
+# The getters that `purge_caches` resets and `warm_caches` fills, by cache key.
+# Every other getter depends on config_path, so it is always warmed first.
+def _get_warmable_getters() -> dict[str, Callable[[], Any]]:
+    return {
+        'config_path':               get_config_paths,
+        'interest_points':           get_interest_points,
+        'salvaging_resource_points': get_catchable_resource_points,
+        'terrain_trees':             get_terrain_trees,
+        'mission_name':              get_mission_names,
+        'story_script':              get_story_script,
+        'story_headers':             get_story_headers,
+        'story_records':             get_story_records,
+        'scene_names':               get_scene_names,
+    }
+
+# Size, age and validity of every cache file. Validity is None for caches whose
+# fingerprint is supplied by their caller, as it can't be checked from here.
+def get_cache_status() -> list[CacheStatus]:
+    statuses = []
+    if not config.cache_root.exists():
+        return statuses
+
+    cache_paths = list(config.cache_root.rglob('*.json')) + list(config.cache_root.glob('*.pickle'))
+    for cache_path in sorted(cache_paths):
+        if cache_path.parent.suffix == '.columns':
+            continue
+        cache_key = cache_path.relative_to(config.cache_root).with_suffix('').as_posix()
+        file_stat = cache_path.stat()
+        valid     = None
+
+        try:
+            cache = _read_cache_header(cache_path)
+            if cache['version'] != config.version:
+                valid = False
+            elif _get_cache_inputs(cache_key) is not None or 'fingerprint' not in cache:
+                valid = _is_valid(cache, _cache_fingerprint(cache_key))
+        except Exception:
+            valid = False
+
+        statuses.append({
+            'key':   cache_key,
+            'size':  file_stat.st_size,
+            'age':   time.time() - file_stat.st_mtime,
+            'valid': valid,
+        })
+    return statuses
+
+# Delete the given caches, or all of them, and forget any copies already loaded
+# by this process. Purging a sharded cache group deletes all of its shards.
+# Returns the keys that were deleted.
+def purge_caches(cache_keys: Iterable[str] | None = None) -> list[str]:
+    if cache_keys is None:
+        cache_keys = [status['key'] for status in get_cache_status()]
+
+    purged = []
+    for cache_key in cache_keys:
+        cache_paths = [_cache_path(cache_key), _pickle_cache_path(cache_key)] + sorted((config.cache_root / cache_key).glob('*.json'))
+        for cache_path in cache_paths:
+            if cache_path.exists():
+                cache_path.unlink()
+                purged.append(cache_path.relative_to(config.cache_root).with_suffix('').as_posix())
+
+        # Columnar stores built from the cache, e.g. terrain_trees.columns.
+        columns_path = config.cache_root / f'{cache_key}.columns'
+        if columns_path.exists():
+            shutil.rmtree(columns_path)
+            purged.append(columns_path.name)
+
+    for getter in _get_warmable_getters().values():
+        getter.cache_clear()
+    return purged
+
+# Compute every warmable cache that is missing or stale, the independent ones
+# in parallel processes; sharded caches are warmed one shard per task. Returns
+# the keys in the order they finished.
+def warm_caches(max_workers: int | None = None) -> list[str]:
+    warmed     = [warm_cache('config_path')]
+    cache_keys = []
+    for cache_key in _get_warmable_getters():
+        if cache_key in _sharded_caches:
+            cache_keys += [f'{cache_key}/{shard}' for shard in _list_shards(cache_key)]
+        elif cache_key != 'config_path':
+            cache_keys.append(cache_key)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(warm_cache, key) for key in cache_keys]
+        for future in as_completed(futures):
+            warmed.append(future.result())
+    return warmed
+
+# Run in a worker process; only the key is sent back, not the data.
+def warm_cache(cache_key: str) -> str:
+    group, _, shard = cache_key.partition('/')
+    if shard:
+        _get_shard(group, shard)
+    else:
+        _get_warmable_getters()[cache_key]()
+    return cache_key
+
+class CacheStatus(TypedDict):
+    key:   str
+    size:  int
+    age:   float
+    valid: bool | None
+
+# -- Private -------------------------------------------------------------------
+
+def _cache_path(cache_key: str) -> Path:
+    return config.cache_root / f'{cache_key}.json'
+
+def _pickle_cache_path(cache_key: str) -> Path:
+    return config.cache_root / f'{cache_key}.pickle'
+
+# A cache's version and fingerprint; a JSON cache is read whole.
+def _read_cache_header(cache_path: Path) -> dict[str, Any]:
+    if cache_path.suffix == '.pickle':
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    return read_json(cache_path)
+
+# The inputs of a cache, a shard, or a whole sharded cache group.
+def _get_cache_inputs(cache_key: str) -> list[PathLike] | None:
+    group, _, shard = cache_key.partition('/')
+    if group in _sharded_caches:
+        kinds, module = _sharded_caches[group]
+        dirs          = [_shard_dir(shard)] if shard else [_shard_roots[kind] for kind in kinds]
+        return dirs + [_preproc_dir / module]
+    return _cache_inputs.get(cache_key)
+
+def _cache_fingerprint(cache_key: str, fingerprint: str | None = None, inputs: Iterable[PathLike] | None = None) -> str | None:
+    if inputs is None:
+        inputs = _get_cache_inputs(cache_key)
+    if inputs is not None:
+        fingerprint = hashlib.sha1(repr((fingerprint, fingerprint_paths(inputs))).encode('utf-8')).hexdigest()
+    return fingerprint
+
+def _is_valid(cache: dict[str, Any], fingerprint: str | None) -> bool:
+    return cache['version'] == config.version and cache.get('fingerprint') == fingerprint
+
+# Write beside the cache and swap it in, so that concurrent warmers and readers
+# never see a partly written file.
+def _write_cache(cache_path: Path, cache: dict[str, Any]) -> None:
+    temp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    write_json(temp_path, cache)
+    os.replace(temp_path, cache_path)
+
+def _write_pickle_cache(cache_path: Path, header: dict[str, Any], data: Any) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    with open(temp_path, 'wb') as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, cache_path)
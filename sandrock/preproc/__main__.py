@@ -0,0 +1,74 @@
+'''
+Inspect, purge and warm the preproc caches.
+
+    python -m sandrock.preproc                  # list caches
+    python -m sandrock.preproc purge KEY [KEY ...]
+    python -m sandrock.preproc purge --all
+    python -m sandrock.preproc warm [--workers N]
+'''
+
+from __future__ import annotations
+
+from sandrock.common  import *
+from sandrock.preproc import get_cache_status, purge_caches, warm_caches
+
+import argparse
+import time
+
+# ------------------------------------------------------------------------------
+
+def run() -> None:
+    parser     = argparse.ArgumentParser(prog='python -m sandrock.preproc')
+    subparsers = parser.add_subparsers(dest='command')
+
+    subparsers.add_parser('list', help='list caches with their size, age and validity')
+
+    purge_parser = subparsers.add_parser('purge', help='delete caches')
+    purge_parser.add_argument('keys', nargs='*')
+    purge_parser.add_argument('--all', action='store_true')
+
+    warm_parser = subparsers.add_parser('warm', help='compute missing or stale caches in parallel')
+    warm_parser.add_argument('--workers', type=int, default=None)
+
+    args = parser.parse_args()
+
+    if args.command == 'purge':
+        if not args.keys and not args.all:
+            parser.error('give cache keys to purge, or --all')
+        purged = purge_caches(None if args.all else args.keys)
+        print(f'Purged {len(purged)} cache(s): {", ".join(purged)}')
+    elif args.command == 'warm':
+        start  = time.perf_counter()
+        warmed = warm_caches(args.workers)
+        print(f'Warmed {len(warmed)} cache(s) in {time.perf_counter() - start:.1f}s: {", ".join(warmed)}')
+    else:
+        print_cache_status()
+
+def print_cache_status() -> None:
+    statuses = get_cache_status()
+    if not statuses:
+        print(f'No caches in {config.cache_root}')
+        return
+
+    width = max(len(status['key']) for status in statuses)
+    for status in statuses:
+        valid = {True: 'valid', False: 'stale', None: '?'}[status['valid']]
+        print(f'{status["key"]:<{width}}  {_format_size(status["size"]):>9}  {_format_age(status["age"]):>8}  {valid}')
+
+# -- Private -------------------------------------------------------------------
+
+def _format_size(size: float) -> str:
+    for unit in ['B', 'KB', 'MB']:
+        if size < 1024:
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GB'
+
+def _format_age(seconds: float) -> str:
+    for unit, length in [('d', 86400), ('h', 3600), ('m', 60)]:
+        if seconds >= length:
+            return f'{seconds / length:.1f}{unit}'
+    return f'{seconds:.0f}s'
+
+if __name__ == '__main__':
+    run()
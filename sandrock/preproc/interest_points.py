@@ -8,8 +8,9 @@ Find points of interest in each scene:
 
 from __future__ import annotations
 
-from sandrock.common    import *
-from sandrock.lib.asset import Bundle
+from sandrock.common       import *
+from sandrock.lib.asset    import Asset, Bundle
+from sandrock.lib.prefetch import PrefetchStats, prefetched
 
 # -- Private -------------------------------------------------------------------
 
@@ -28,22 +29,54 @@ def _find_scene_interests(scene_path: PathLike) -> list[InterestPoint]:
     bundle = Bundle(scene_path)
     interests: list[InterestPoint] = []
 
-    for behav in bundle.behaviours:
+    # Every behaviour has to be read to learn its script, so read ahead.
+    stats = PrefetchStats(config.prefetch_depth)
+    for behav, _ in prefetched(bundle.behaviours, _load_data, stats=stats):
         if behav.script in _interest_scripts:
-            interest = {
+            transform = behav.game_object.transform
+            interest  = {
                 'scene':     scene_path.name,
                 'id':        behav.game_object.id,
                 'type':      behav.script,
                 'behaviour': str(behav.path),
-                'transform': str(behav.game_object.transform.path),
+                'transform': str(transform.path),
+                'enabled':   bool(behav.data['m_Enabled']),
+                'position':  transform.data['m_LocalPosition'],
             }
+            _copy_behaviour_fields(interest, behav.data)
+
             for comp in behav.game_object.components:
                 if comp.type == 'MonoBehaviour' and comp.script == 'SceneArea':
-                    interest['scene_area'] = str(comp.path)
+                    interest['scene_area']        = str(comp.path)
+                    interest['scene_area_points'] = [point['pos'] for point in comp.data['points']]
             interests.append(interest)
-    
+
+    print(f'Read {scene_path.name} behaviours: {stats}')
     return interests
 
+def _load_data(asset: Asset) -> Any:
+    return asset.data
+
+# The behaviour fields that downstream code reads, copied into the record so
+# that it never has to open the behaviour file itself.
+_behaviour_fields = {
+    'id':                   'box_id',
+    'generatorId':          'generator_id',
+    'maxCount':             'max_count',
+    'spawnerMonsterInfos':  'spawner_monster_infos',
+    'typeTag':              'type_tag',
+    'weightConfigs':        'weight_configs',
+}
+
+def _copy_behaviour_fields(interest: InterestPoint, data: dict[str, Any]) -> None:
+    for key, field in _behaviour_fields.items():
+        if key in data:
+            interest[field] = data[key]
+
+    # protoId for SpawnMono_Point, monsterId for MonsterArea_IMap.
+    if 'protoId' in data or 'monsterId' in data:
+        interest['monster_id'] = data.get('protoId', data.get('monsterId'))
+
 # Removed why?
 #def _get_additional_resource_areas():
 #    bundle = Bundle(config.assets_root / 'resourceareainfo')
@@ -69,9 +102,19 @@ def find_interest_points() -> list[InterestPoint]:
     return interests
 
 class InterestPoint(TypedDict):
-    scene:      str
-    id:         int
-    type:       str
-    behaviour:  str
-    transform:  str
-    scene_area: NotRequired[str]
+    scene:                 str
+    id:                    int
+    type:                  str
+    behaviour:             str
+    transform:             str
+    enabled:               bool
+    position:              dict[str, float]
+    scene_area:            NotRequired[str]
+    scene_area_points:     NotRequired[list[dict[str, float]]]
+    box_id:                NotRequired[int]
+    generator_id:          NotRequired[int]
+    max_count:             NotRequired[int]
+    monster_id:            NotRequired[int]
+    spawner_monster_infos: NotRequired[list[dict[str, Any]]]
+    type_tag:              NotRequired[str]
+    weight_configs:        NotRequired[list[dict[str, Any]]]
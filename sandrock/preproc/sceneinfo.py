@@ -0,0 +1,99 @@
+'''
+Match scene system names (scene bundle and sceneinfo asset names) to scene IDs,
+and scene IDs to their localized name IDs.
+'''
+
+from __future__ import annotations
+
+from sandrock.common              import *
+from sandrock.lib.asset           import Bundle
+from sandrock.lib.designer_config import DesignerConfig
+
+# ------------------------------------------------------------------------------
+
+# The sceneinfo bundle does not contain data for *all* scenes, but the remainder
+# that are given in AssetConfigSceneConfig are either duplicates or unnamed.
+#
+# Is this supposed to be a clue? I don't know what "ScenarioModule" is:
+# Pathea.ScenarioNs.AdditiveScene & Pathea.ScenarioNs.ScenarioModule
+#
+# In AssetConfigSceneConfig, but absent from system_name_to_id:
+# 48: No name
+# 52: 'Eufaula Salvage Abandoned Ruins', see 64
+# 61: 'Gecko Station Abandoned Ruins', see 60
+# 89: No name
+
+_manual: dict[str, int] = {
+    'VoxelDungeon2':        60,
+    'InfiniteTrialDungeon': 90
+}
+
+def find_scene_names() -> SceneNames:
+    system_name_to_id = {}
+
+    for scene in Bundle('sceneinfo').behaviours:
+        if scene.script == 'SceneInfoObj':
+            id   = _get_scene_id_from_data(scene.data)
+            name = scene.data['m_Name']
+            assert name not in system_name_to_id
+
+            if id in _manual.values():
+                print(f'Warning: Assigning manual value to scene {id} that has inferred name {name}')
+                continue
+
+            system_name_to_id[name] = id
+
+    system_name_to_id = system_name_to_id | _manual
+
+    # Test the assumption that every scene has a unique system name.
+    # It fails without manual assigment. Both 60 and 90 have multiple names:
+    # 60, Gecko Station Abandoned Ruins: VoxelDungeon2, BuriedRoomTest
+    # 90, Dead Sea Ruins: InfiniteTrialDungeon, TrialDungeon_Infinite, RollerCoaster
+    # Went with PermDenied's values.
+    assert len(system_name_to_id) == len(set(system_name_to_id.values()))
+
+    # Scene lookups by name ignore case and underscores; the first system name
+    # to claim a normalized name keeps it.
+    normalized_to_id = {}
+    for name, id in system_name_to_id.items():
+        normalized_to_id.setdefault(normalize_scene_name(name), id)
+
+    id_to_name_id = {}
+    for scene_config in DesignerConfig.Scene:
+        id_to_name_id.setdefault(scene_config['scene'], scene_config['nameId'])
+
+    return {
+        'system_name_to_id': system_name_to_id,
+        'normalized_to_id':  normalized_to_id,
+        'id_to_system_name': {id: name for name, id in system_name_to_id.items()},
+        'id_to_name_id':     id_to_name_id,
+    }
+
+def normalize_scene_name(name: str) -> str:
+    return name.lower().replace('_', '')
+
+# -- Private -------------------------------------------------------------------
+
+def _get_scene_id_from_data(data: dict[str, Any]) -> int:
+    ids = []
+    data_to_check = [
+        'sceneAreaDatas',
+        'sceneDramaDatas',
+        'sceneExtranceDatas',
+        'scenePointDatas'
+    ]
+    for key in data_to_check:
+        ids += [item['scene'] for item in data[key]]
+    # PlayerHome has nothing in it by default, so it doesn't have any data
+    # to let us know the scene ID.
+    if data['m_Name'].lower() == 'playerhome': ids += [5]
+    ids = list(set(ids))
+
+    assert len(ids) == 1
+    return ids[0]
+
+class SceneNames(TypedDict):
+    system_name_to_id: dict[str, int]
+    normalized_to_id:  dict[str, int]
+    id_to_system_name: dict[int, str]
+    id_to_name_id:     dict[int, int]
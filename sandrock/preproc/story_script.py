@@ -0,0 +1,191 @@
+'''
+Parse the story scripts: every mission XML in the story_script bundle, with the
+URL-encoded attribute values decoded. The scripts are parsed in parallel by a
+pool of worker processes. The parsed corpus is cached as a JSON tree so the XML
+only has to be parsed once per version, and the preproc getter shares one set
+of elements between everything that reads the story.
+
+For readers that only need a few missions, the headers of every script (root
+attributes and the missions it runs) are also found with a streaming parse, and
+single scripts can be read on demand.
+
+The story structures read missions as records: each script reduced to its root
+attributes, child missions and triggers, with every STMT kept as its name and
+attributes. Records are built from the parsed corpus and hold no elements or
+references back to a Story, so they can be pickled to the cache between runs.
+'''
+
+from __future__ import annotations
+
+from sandrock.common    import *
+from sandrock.lib.asset import Bundle
+
+from concurrent.futures import ProcessPoolExecutor
+
+import multiprocessing
+import urllib.parse
+
+# ------------------------------------------------------------------------------
+
+# Script ID to the script's root element as a JSON tree. Parsing and decoding
+# the XML is most of the cost, so the scripts are split between a pool of worker
+# processes, which send back the trees. The workers are spawned, not forked, so
+# this is safe to call while other threads are running, like the item source
+# passes.
+def find_story_script(workers: int | None = None) -> dict[int, StoryNode]:
+    bundle    = Bundle('story_script')
+    paths     = {int(asset.name): asset.path for asset in bundle.assets if asset.type == 'TextAsset'}
+    workers   = workers or multiprocessing.cpu_count()
+    chunksize = max(1, len(paths) // (workers * 4))
+    context   = multiprocessing.get_context('spawn')
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        return dict(zip(paths, executor.map(_read_story_node, paths.values(), chunksize=chunksize)))
+
+# An element as [tag, attrib, children], followed by its text and tail if it
+# has either.
+StoryNode: TypeAlias = list
+
+def to_node(element: ElementTree.Element) -> StoryNode:
+    node = [element.tag, dict(element.attrib), [to_node(child) for child in element]]
+    if element.text is not None or element.tail is not None:
+        node += [element.text, element.tail]
+    return node
+
+def to_element(node: StoryNode) -> ElementTree.Element:
+    element = ElementTree.Element(node[0], node[1])
+    element.extend(to_element(child) for child in node[2])
+    if len(node) > 3:
+        element.text, element.tail = node[3], node[4]
+    return element
+
+# Script ID to the script's root attributes, the IDs of the missions it runs and
+# its XML file relative to the assets root.
+def find_story_headers() -> dict[int, StoryHeader]:
+    bundle  = Bundle('story_script')
+    headers = {}
+
+    for asset in bundle.assets:
+        if asset.type == 'TextAsset':
+            headers[int(asset.name)] = _scan_header(asset.path)
+
+    return headers
+
+class StoryHeader(TypedDict):
+    attrib:   dict[str, str]
+    children: list[int]
+    path:     str
+
+def read_story_script(path: PathLike) -> ElementTree.Element:
+    root = ElementTree.fromstring((config.assets_root / path).read_text(encoding='utf-8'))
+    _recursive_unquote(root)
+    return root
+
+# -- Mission records -----------------------------------------------------------
+
+class MissionRecord(TypedDict):
+    attrib:   dict[str, str]
+    children: list[int]
+    triggers: list[TriggerRecord]
+
+# A section is None unless the trigger has exactly one element for it, which is
+# reported when the trigger is read.
+class TriggerRecord(TypedDict):
+    procedure:  float
+    step:       float
+    repeat:     int
+    events:     list[StmtRecord] | None
+    conditions: list[StmtRecord] | None
+    actions:    list[StmtRecord] | None
+
+# A STMT's name, e.g. 'RUN MISSION', which picks the STMT class that reads it,
+# its attributes, and the index of the GROUP it is in, if any. Answers `get` and
+# `attrib` like the element it was read from.
+class StmtRecord:
+    __slots__ = ('stmt', 'attrib', 'group_index')
+
+    def __init__(self, attrib: dict[str, str], group_index: int | None = None):
+        self.stmt        = attrib.get('stmt')
+        self.attrib      = attrib
+        self.group_index = group_index
+
+    def get(self, key: str, default: str | None = None) -> str | None:
+        return self.attrib.get(key, default)
+
+    def __repr__(self) -> str:
+        return f'StmtRecord({self.stmt!r}, {self.attrib}, group_index={self.group_index})'
+
+# Script ID to the script's mission record, from the script roots.
+def find_story_records(scripts: dict[int, ElementTree.Element]) -> dict[int, MissionRecord]:
+    return {script_id: to_mission_record(root) for script_id, root in scripts.items()}
+
+def read_mission_record(path: PathLike) -> MissionRecord:
+    return to_mission_record(read_story_script(path))
+
+def to_mission_record(root: ElementTree.Element) -> MissionRecord:
+    triggers = []
+    for trigger in root.findall('TRIGGER'):
+        triggers.append({
+            'procedure':  float(trigger.get('procedure')),
+            'step':       float(trigger.get('step')),
+            'repeat':     int(trigger.get('repeat')),
+            'events':     _to_stmt_records(trigger.findall('EVENTS')),
+            'conditions': _to_stmt_records(trigger.findall('CONDITIONS')),
+            'actions':    _to_stmt_records(trigger.findall('ACTIONS')),
+        })
+
+    return {
+        'attrib':   dict(root.attrib),
+        'children': [int(stmt.get('missionId')) for stmt in root.iter('STMT') if stmt.get('stmt') == 'RUN MISSION'],
+        'triggers': triggers,
+    }
+
+# -- Private -------------------------------------------------------------------
+
+def _read_story_node(path: Path) -> StoryNode:
+    return to_node(read_story_script(path))
+
+def _to_stmt_records(sections: list[ElementTree.Element]) -> list[StmtRecord] | None:
+    if len(sections) != 1:
+        return None
+
+    records = []
+    for child in sections[0]:
+        if child.tag == 'GROUP':
+            group_index = int(child.get('index'))
+            records    += [StmtRecord(dict(stmt.attrib), group_index) for stmt in child.findall('STMT')]
+        elif child.tag == 'STMT':
+            records.append(StmtRecord(dict(child.attrib)))
+    return records
+
+# Only the root's attributes and the RUN MISSION STMTs are kept; every element is
+# dropped once it has been read past.
+def _scan_header(path: Path) -> StoryHeader:
+    attrib   = None
+    children = []
+
+    for event, element in ElementTree.iterparse(path, events=('start', 'end')):
+        if event == 'end':
+            element.clear()
+        elif attrib is None:
+            attrib = {k: _unquote(v) for k, v in element.attrib.items()}
+        elif element.tag == 'STMT' and _unquote(element.get('stmt', '')) == 'RUN MISSION':
+            children.append(int(_unquote(element.get('missionId'))))
+
+    return {
+        'attrib':   attrib,
+        'children': children,
+        'path':     path.relative_to(config.assets_root).as_posix(),
+    }
+
+def _unquote(value: str) -> str:
+    return urllib.parse.unquote(value) if '%' in value else value
+
+# Decode URL-encoded strings in the XML so we can read the properties properly.
+def _recursive_unquote(element: ElementTree.Element) -> None:
+    for k, v in element.attrib.items():
+        if v and isinstance(v, str):
+            element.attrib[k] = _unquote(v)
+
+    for child in element:
+        _recursive_unquote(child)
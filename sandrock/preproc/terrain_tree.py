@@ -7,6 +7,9 @@ from __future__ import annotations
 from sandrock import *
 from sandrock.lib.asset import Bundle
 
+import numpy as np
+import os
+
 # ------------------------------------------------------------------------------
 
 def find_terrain_trees() -> list[TerrainTree]:
@@ -54,7 +57,113 @@ def find_scene_trees(scene_path: PathLike) -> list[TerrainTree]:
 
     return trees
 
-def TerrainTree(TypedDict):
+class TerrainTree(TypedDict):
     scene: str
     prefab: str
     position: Vector3
+
+# ------------------------------------------------------------------------------
+
+# All terrain trees as columns: scene and prefab codes into small string tables,
+# and the x, y, z position. Columns are numpy arrays, saved as .npy files and
+# memory-mapped back, so opening the cached trees reads almost nothing and
+# consumers can filter with vectorized masks.
+class TerrainTrees:
+    columns = ['scene', 'prefab', 'x', 'y', 'z']
+
+    def __init__(self, scenes: list[str], prefabs: list[str], columns: dict[str, Any]):
+        self.scenes  = scenes
+        self.prefabs = prefabs
+        self.scene   = columns['scene']
+        self.prefab  = columns['prefab']
+        self.x       = columns['x']
+        self.y       = columns['y']
+        self.z       = columns['z']
+
+    @classmethod
+    def from_records(cls, trees: list[TerrainTree]) -> TerrainTrees:
+        scenes       = sorted({tree['scene'] for tree in trees})
+        prefabs      = sorted({tree['prefab'] for tree in trees})
+        scene_codes  = {name: i for i, name in enumerate(scenes)}
+        prefab_codes = {name: i for i, name in enumerate(prefabs)}
+
+        columns = {
+            'scene':  np.array([scene_codes[tree['scene']] for tree in trees], dtype=np.int32),
+            'prefab': np.array([prefab_codes[tree['prefab']] for tree in trees], dtype=np.int32),
+        }
+        for axis in ['x', 'y', 'z']:
+            columns[axis] = np.array([tree['position'][axis] for tree in trees], dtype=np.float64)
+
+        return cls(scenes, prefabs, columns)
+
+    # Open trees saved with `save`. Returns None if they are missing or were
+    # saved for a different version or fingerprint.
+    @classmethod
+    def load(cls, path: PathLike, fingerprint: str) -> TerrainTrees | None:
+        path = Path(path)
+        try:
+            tables = json.loads((path / 'tables.json').read_text(encoding='utf-8'))
+            if tables['version'] != config.version or tables['fingerprint'] != fingerprint:
+                return None
+            columns = {name: np.load(path / f'{name}.npy', mmap_mode='r') for name in cls.columns}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return cls(tables['scenes'], tables['prefabs'], columns)
+
+    # The string tables, which also mark the columns as complete, are written
+    # last.
+    def save(self, path: PathLike, fingerprint: str) -> None:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        (path / 'tables.json').unlink(missing_ok=True)
+
+        for name in self.columns:
+            temp_path = path / f'{name}.npy.tmp'
+            with open(temp_path, 'wb') as f:
+                np.save(f, getattr(self, name))
+            os.replace(temp_path, path / f'{name}.npy')
+
+        tables = {
+            'version':     config.version,
+            'fingerprint': fingerprint,
+            'scenes':      self.scenes,
+            'prefabs':     self.prefabs,
+        }
+        (path / 'tables.json').write_text(json.dumps(tables, ensure_ascii=False), encoding='utf-8')
+
+    def __len__(self) -> int:
+        return len(self.scene)
+
+    def __iter__(self) -> Iterator[TerrainTree]:
+        return iter(self.records())
+
+    def scene_mask(self, *names: str) -> Any:
+        codes = [self.scenes.index(name) for name in names if name in self.scenes]
+        return np.isin(self.scene, codes)
+
+    def prefab_mask(self, *names: str) -> Any:
+        codes = [self.prefabs.index(name) for name in names if name in self.prefabs]
+        return np.isin(self.prefab, codes)
+
+    # The distinct prefabs of the trees selected by a boolean mask.
+    def prefabs_in(self, mask: Any) -> list[str]:
+        return [self.prefabs[code] for code in np.unique(self.prefab[mask]).tolist()]
+
+    # The trees selected by a boolean mask, or all of them, as records.
+    def records(self, mask: Any = None) -> list[TerrainTree]:
+        rows = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        return [
+            {
+                'scene':    self.scenes[self.scene[row]],
+                'prefab':   self.prefabs[self.prefab[row]],
+                'position': {'x': float(self.x[row]), 'y': float(self.y[row]), 'z': float(self.z[row])},
+            }
+            for row in rows
+        ]
+
+    # Each distinct (scene, prefab) pair, for consumers that only care which
+    # trees grow where.
+    def pairs(self) -> list[tuple[str, str]]:
+        codes = np.unique(self.scene.astype(np.int64) * len(self.prefabs) + self.prefab)
+        return [(self.scenes[code // len(self.prefabs)], self.prefabs[code % len(self.prefabs)]) for code in codes.tolist()]
@@ -7,12 +7,16 @@ missions to the wiki without having to play through them.
 from __future__ import annotations
 
 from sandrock                              import *
-from sandrock.lib.asset                    import Asset
+from sandrock.lib.designer_config          import note_reads
+from sandrock.preproc                      import get_story_headers, get_story_records, load_mission_record
 from sandrock.structures.conversation      import *
 from sandrock.structures.story_xml.stmt    import *
 from sandrock.structures.story_xml.trigger import *
 
-import urllib.parse
+import threading
+
+if TYPE_CHECKING:
+    from sandrock.preproc.story_script import MissionRecord, StoryHeader
 
 # -- Private -------------------------------------------------------------------
 
@@ -78,30 +82,33 @@ _general_mission_controllers = {
     1700145: 'Newspaper'
 }
 
-# Decode URL-encoded strings in the XML so we can read the properties properly.
-def _recursive_unquote(element: ElementTree.Element) -> None:
-    for k, v in element.attrib.items():
-        if v and isinstance(v, str) and '%' in v:
-            element.attrib[k] = urllib.parse.unquote(v)
-    
-    for child in element:
-        _recursive_unquote(child)
-
 # ------------------------------------------------------------------------------
 
+# The record is the mission's script reduced to its attributes, children and
+# triggers, parsed for the whole story at once in the preproc; see
+# sandrock/preproc/story_script.py. A mission can instead be made from its
+# header alone, and then reads its record the first time its content is needed.
 class Mission:
-    def __init__(self, story: Story, asset: Asset):
-        self._asset: Asset             = asset
-        self.story: Story              = story 
-        self.root: ElementTree.Element = asset.read_xml()
-        self.id: int                   = int(self.root.get('id'))
+    def __init__(self, story: Story, record: MissionRecord | None = None, header: StoryHeader | None = None):
+        assert record is not None or header is not None
+        source = record if record is not None else header
+
+        self.story: Story                    = story 
+        self._record: MissionRecord | None   = record
+        self._attrib: dict[str, str]         = source['attrib']
+        self._children_ids: list[int]        = source['children']
+        self.id: int                         = int(self._attrib.get('id'))
 
         self._content : dict               = None
         self._conversation_modifiers: dict = None
         self._vars_to_mission_id: dict     = None
-
-        _recursive_unquote(self.root)
     
+    @property
+    def record(self) -> MissionRecord:
+        if self._record is None:
+            self._record = load_mission_record(self.id)
+        return self._record
+
     @property
     def children(self):
         return self.story.get_children_for(self.id)
@@ -126,7 +133,7 @@ class Mission:
     
     # "Controllers" coordinate when missions, events, and other occurrences 
     # happen.
-    @property
+    @cached_property
     def is_controller(self) -> bool:
         return (
             self.id in _npc_mission_controllers.values()
@@ -138,28 +145,28 @@ class Mission:
     def is_event(self) -> bool:
         return self.name in _event_names.values()
     
+    # Main only if this and every first parent above it are marked main.
     @property
     def is_main(self) -> bool:
-        self_main = self.root.get('isMain').lower() == 'true'
+        return self.story._resolve_is_main(self)
 
-        if self.parents:
-            return self.parents[0].is_main and self_main
-        
-        return self.root.get('isMain').lower() == 'true'
+    @property
+    def is_main_native(self) -> bool:
+        return self._attrib.get('isMain').lower() == 'true'
     
     @property
     def meta_name(self) -> str:
-        return self.root.get('name', '')
+        return self._attrib.get('name', '')
 
     @property
     def name(self) -> str:
-        return self.get_name()
+        return self.story._resolve_name(self)
     
     @property
     def name_native(self) -> str:
-        name_id = self.root.get('nameId')
+        name_id = self._attrib.get('nameId')
         if name_id and name_id not in ['0', '-1']:
-            name = text(int(self.root.get('nameId')))
+            name = text(int(name_id))
             if name != '￥not use￥': return name
 
         if self.id in _event_names.keys():
@@ -200,10 +207,11 @@ class Mission:
     # properties: description_id|npc_id|opening_conversation_id?|-1 or 10&0: means what?
     @property
     def properties(self):
-        return self.root.get('properties').split('|')
+        return self._attrib.get('properties').split('|')
     
     @property
     def rewards_data(self) -> list[str]:
+        note_reads('MissionRewards')
         if not hasattr(self, '_rewards_data'):
             self._rewards_data = next(
                 (entry for entry in DesignerConfig.MissionRewards if entry.get('missionId') == self.id),
@@ -242,27 +250,62 @@ class Mission:
             for step, step_triggers in steps.items():
                 triggers += step_triggers
         return triggers
+
+    # This order usually makes the output follow the approximate order that
+    # mission events play out in, but could be improved.
+    @cached_property
+    def ordered_triggers(self) -> list[Trigger]:
+        return sorted(self.triggers, key=lambda x: (x.procedure, x._step))
+
+    # The ordered triggers, with the triggers that follow up on ended
+    # conversations moved to be right after their respective conversations.
+    @cached_property
+    def reordered_triggers(self) -> list[Trigger]:
+        followups = defaultdict(list)
+        for trigger in self.ordered_triggers:
+            ended_conversation_c_id = trigger.ended_conversation_c_id
+            if ended_conversation_c_id:
+                followups[ended_conversation_c_id].append(trigger)
+
+        reordered_triggers = []
+        placed             = set()
+        for trigger in self.ordered_triggers:
+            if trigger in placed: continue
+            reordered_triggers.append(trigger)
+            placed.add(trigger)
+
+            for followup_trigger in followups.get(trigger.started_conversation_c_id, []):
+                if followup_trigger not in placed:
+                    reordered_triggers.append(followup_trigger)
+                    placed.add(followup_trigger)
+
+        return reordered_triggers
+    
+    # Child mission ID to the position in the ordered triggers of the first
+    # trigger that runs it.
+    @cached_property
+    def run_mission_positions(self) -> dict[int, int]:
+        positions = {}
+        for position, trigger in enumerate(self.ordered_triggers):
+            for mission_id in trigger.run_mission_ids:
+                positions.setdefault(mission_id, position)
+        return positions
     
     @property
     def type(self) -> str:
         return 'Main' if self.is_main else 'Side'
     
     def get_children_ids(self) -> list[int]:
-        children_ids = []
-        for stmt in self.root.iter('STMT'):
-            if stmt.get('stmt') == 'RUN MISSION':
-                children_ids.append(int(stmt.get('missionId')))
-        
-        return children_ids
+        return list(self._children_ids)
     
     def get_content(self) -> dict:
         if not self._content:
             content = {}
             order = defaultdict(int)
 
-            for trigger in self.root.findall('TRIGGER'):
-                procedure = float(trigger.get('procedure'))
-                step      = float(trigger.get('step'))
+            for trigger in self.record['triggers']:
+                procedure = trigger['procedure']
+                step      = trigger['step']
 
                 if procedure not in content: content[procedure] = {}
                 if step in content[procedure]:
@@ -318,18 +361,11 @@ class Mission:
         
         return mail_ids_by_mission_id
     
-    def get_name(self, stack_level: int = 0) -> str:
-        if self.name_native:
-            return self.name_native
-        
-        # Might be too generous; we're probably getting follow-up events that
-        # aren't part of the mission.
-        if stack_level > 10:
-            print(f'Warning: Possible looping parent-child relationship for {self.id}')
-            return ''
-        
-        parent_name = self.parents[0].get_name(stack_level + 1) if len(self.parents) else ''
-        return parent_name
+    # A mission without a name of its own takes its first parent's. Might be too
+    # generous; we're probably getting follow-up events that aren't part of the
+    # mission.
+    def get_name(self) -> str:
+        return self.name
 
     # Some newspapers are explicitly set by STMTs, but some have a mission ID
     # that causes them to show up. The ones from STMT are already included, so
@@ -395,8 +431,13 @@ class Mission:
         
         return self._vars_to_mission_id
     
-    @cached_property
+    @property
     def in_mission_talks(self) -> list[dict]:
+        note_reads('InMissionTalk')
+        return self._in_mission_talks
+
+    @cached_property
+    def _in_mission_talks(self) -> list[dict]:
         in_mission_talks = []
 
         for talk in DesignerConfig.InMissionTalk:
@@ -522,14 +563,9 @@ class Mission:
         if mission_id not in self.get_children_ids(): 
             raise ValueError(f'Mission {mission_id} is not a child of {self.id}')
 
-        previous_trigger = None
-        ordered_triggers = sorted(self.triggers, key=lambda x: (x.procedure, x._step))
-
-        for trigger in ordered_triggers:
-            if trigger.is_run_mission(mission_id):
-                return [previous_trigger, trigger] if previous_trigger else [trigger]
-        
-            previous_trigger = trigger
+        position = self.run_mission_positions.get(mission_id)
+        if position is not None:
+            return self.ordered_triggers[max(position - 1, 0):position + 1]
     
     def read_run_conditions(self) -> list[str]:
         lines = ['==Overview==']
@@ -567,27 +603,7 @@ class Mission:
         lines.append('==Conduct==')
         lines.append('')
         
-        # This order usually makes the output follow the approximate order that
-        # mission events play out in, but could be improved.
-        ordered_triggers = sorted(self.triggers, key=lambda x: (x.procedure, x._step))
-        # Move the triggers that follow up on ended conversations to be right 
-        # after their respective conversations.
-        reordered_triggers = []
-        for trigger in ordered_triggers:
-            if trigger in reordered_triggers: continue
-
-            started_conversation_c_id = trigger.started_conversation_c_id
-            
-            if started_conversation_c_id:
-                reordered_triggers.append(trigger)
-                for followup_trigger in ordered_triggers:
-                    if followup_trigger.ended_conversation_c_id == started_conversation_c_id:
-                        if followup_trigger not in reordered_triggers:
-                            reordered_triggers.append(followup_trigger)
-            else:
-                reordered_triggers.append(trigger)
-        
-        for trigger in reordered_triggers:
+        for trigger in self.reordered_triggers:
             if trigger.is_quiet: continue
             lines += trigger.read()
             lines += ['']
@@ -609,19 +625,34 @@ class Mission:
         lines = self.read()
         print('\n'.join(lines))
 
+# With lazy, missions are made from the script headers and each mission's script
+# is only parsed when its content is first needed, which is much faster for
+# reading a few missions. Otherwise every script is parsed up front, in parallel.
 class Story:
-    def __init__(self):
-        self.bundle            = Bundle('story_script')
+    def __init__(self, lazy: bool = False):
         self.missions          = {}
         self.mission_flags     = defaultdict(set)
         self.mission_parentage = {}
         self.mission_vars      = defaultdict(set)
 
-        for asset in self.bundle.assets:
-            if asset.type == 'TextAsset':
-                mission                            = Mission(self, asset)
-                self.missions[mission.id]          = mission
-                self.mission_parentage[mission.id] = mission.get_children_ids()
+        if lazy:
+            missions = [Mission(self, header=header) for header in get_story_headers().values()]
+        else:
+            missions = [Mission(self, record) for record in get_story_records().values()]
+
+        for mission in missions:
+            self.missions[mission.id]          = mission
+            self.mission_parentage[mission.id] = mission.get_children_ids()
+
+        # Child to parent IDs, in the order the parents appear in the story.
+        self.mission_parents = defaultdict(list)
+        for parent_id, child_ids in self.mission_parentage.items():
+            for child_id in dict.fromkeys(child_ids):
+                self.mission_parents[child_id].append(parent_id)
+
+        # Names and main flags resolved through parents so far, by mission ID.
+        self._names   = {}
+        self._is_main = {}
     
     def __contains__(self, mission_id) -> bool:
         return mission_id in self.missions
@@ -637,7 +668,7 @@ class Story:
     
     def get_parents_for(self, id: int) -> list[Mission]:
         assert id in self.missions
-        parent_ids = [par_id for par_id, child_ids in self.mission_parentage.items() if id in child_ids]
+        parent_ids = self.mission_parents.get(id, [])
         parent_missions = [self.get_mission(parent_id) for parent_id in parent_ids]
         assert len(parent_missions) or id in self.mission_parentage, f'Mission {id} has no parents and is not a parent itself.'
 
@@ -655,6 +686,54 @@ class Story:
         name_dict = {mission.id: mission.name for id, mission in self.missions.items()}
         return dict(sorted(name_dict.items()))
     
+    # The chain of first parents from a mission up to the first mission whose
+    # value is already known or that has no parent, stopping early once `stop`
+    # is true for a mission. Also returns whether the chain runs into a loop.
+    def _first_parent_chain(self, mission: Mission, known: dict, stop: Callable[[Mission], bool]) -> tuple[list[Mission], Mission | None, bool]:
+        chain = []
+        seen  = set()
+
+        while mission is not None and mission.id not in known:
+            if mission.id in seen:
+                return chain, None, True
+            seen.add(mission.id)
+            chain.append(mission)
+            if stop(mission):
+                return chain, None, False
+
+            parent_ids = self.mission_parents.get(mission.id)
+            mission    = self.missions.get(parent_ids[0]) if parent_ids else None
+
+        return chain, mission, False
+
+    def _resolve_name(self, mission: Mission) -> str:
+        if mission.id in self._names:
+            return self._names[mission.id]
+
+        chain, known, looped = self._first_parent_chain(mission, self._names, lambda m: bool(m.name_native))
+        if looped:
+            print(f'Warning: Looping parent-child relationship for {mission.id}')
+            name = ''
+        elif known is not None:
+            name = self._names[known.id]
+        else:
+            name = chain[-1].name_native or ''
+
+        for link in chain:
+            self._names[link.id] = name
+        return name
+
+    def _resolve_is_main(self, mission: Mission) -> bool:
+        if mission.id in self._is_main:
+            return self._is_main[mission.id]
+
+        chain, known, _ = self._first_parent_chain(mission, self._is_main, lambda m: False)
+        is_main         = self._is_main[known.id] if known is not None else True
+        for link in reversed(chain):
+            is_main = is_main and link.is_main_native
+            self._is_main[link.id] = is_main
+        return self._is_main[mission.id]
+
     def get_missions_for_npc_controller(self, npc_name: str) -> list[Mission]:
         if npc_name in _npc_mission_controllers.keys():
             mission_id = _npc_mission_controllers[npc_name]
@@ -664,3 +743,29 @@ class Story:
             ]
         
         return []
+
+# -- Shared story --------------------------------------------------------------
+
+# Building a Story walks the whole story script, so one is built per process and
+# shared by everything that reads it. Treat it as read-only.
+def get_story() -> Story:
+    with _story_lock:
+        if _story_session['story'] is None:
+            _story_session['story']   = Story()
+            _story_session['builds'] += 1
+        else:
+            _story_session['hits']   += 1
+        return _story_session['story']
+
+# Drop the shared story, e.g. after its caches were purged, so that the next
+# `get_story()` builds it again.
+def reset_story() -> None:
+    with _story_lock:
+        _story_session['story'] = None
+
+# How many times the shared story was built and reused, to confirm it is shared.
+def get_story_stats() -> dict[str, int]:
+    return {'builds': _story_session['builds'], 'hits': _story_session['hits']}
+
+_story_lock    = threading.Lock()
+_story_session = {'story': None, 'builds': 0, 'hits': 0}
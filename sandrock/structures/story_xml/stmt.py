@@ -22,13 +22,15 @@ from __future__ import annotations
 
 from sandrock                         import *
 from sandrock.lib.asset               import Asset
+from sandrock.lib.designer_config     import note_reads
 from sandrock.structures.conversation import *
 from sandrock.structures.extras       import *
 
 import urllib.parse
 
 if TYPE_CHECKING:
-    from sandrock.structures.story import Mission
+    from sandrock.preproc.story_script import StmtRecord
+    from sandrock.structures.story     import Mission
 
 # -- Private -------------------------------------------------------------------
 
@@ -47,26 +49,26 @@ _weather_map = {
 
 # -- STMT Class ----------------------------------------------------------------
 
+# STMTs are built for every trigger of every mission, so instances keep only
+# their slots, and the class for a STMT name is looked up in a table built once.
 class Stmt:
+    __slots__ = ('group_index', '_mission', '_stmt')
+
     _stmt_matches: list[str] = []
 
     @classmethod
-    def find_stmt_class(cls, stmt: ElementTree.Element) -> Type[Stmt]:
-        for stmt_class in Stmt.__subclasses__():
-            if stmt_class.is_type_match(stmt):
-                return stmt_class
-        
-        return cls
+    def find_stmt_class(cls, stmt: StmtRecord) -> Type[Stmt]:
+        return _get_stmt_classes().get(stmt.get('stmt'), cls)
 
     @classmethod
-    def is_type_match(cls, stmt: ElementTree.Element) -> bool:
+    def is_type_match(cls, stmt: StmtRecord) -> bool:
         val = stmt.get('stmt')
         return val in cls._stmt_matches
 
-    def __init__(self, stmt: ElementTree.Element, group_index: int | None, mission: Mission):
+    def __init__(self, stmt: StmtRecord, group_index: int | None, mission: Mission):
         self.group_index = group_index
         self._mission = mission
-        self._stmt: ElementTree.Element = stmt
+        self._stmt: StmtRecord = stmt
         self.extract_properties()
     
     @property
@@ -138,7 +140,7 @@ class Stmt:
     
     @property
     def stmt(self) -> str:
-        return self._stmt.get('stmt')
+        return self._stmt.stmt
     
     def extract_properties(self) -> None:
         pass
@@ -164,21 +166,29 @@ class Stmt:
 # -- STMT Types ----------------------------------------------------------------
 
 class _StmtActionNewspaperChange(Stmt):
+    __slots__ = ('newspaper_id', '_newspaper_content')
+
     _stmt_matches = [
         'ACTION NEWSPAPER CHANGE'
     ]
 
     def extract_properties(self) -> None:
-        self.newspaper_id: int = int(self._stmt.get('id'))
+        self.newspaper_id: int                           = int(self._stmt.get('id'))
+        self._newspaper_content: NewspaperContent | None = None
 
-    @cached_property
-    def newspaper_content(self) -> str:
-        return NewspaperContent(self.newspaper_id)
+    @property
+    def newspaper_content(self) -> NewspaperContent:
+        note_reads('NewspaperContent')
+        if self._newspaper_content is None:
+            self._newspaper_content = NewspaperContent(self.newspaper_id)
+        return self._newspaper_content
 
     def read(self) -> list[str]:
         return self.newspaper_content.read()
 
 class _StmtActionNpcAddTag(Stmt):
+    __slots__ = ('npc_id', 'tag')
+
     _stmt_matches = [
         'ACTION NPC ADD TAG'
     ]
@@ -194,6 +204,8 @@ class _StmtActionNpcAddTag(Stmt):
         return [f'Add tag "{self.tag}" to {self.npc_name()}']
 
 class _StmtAlways(Stmt):
+    __slots__ = ()
+
     _stmt_matches = [
         'ALWAYS'
     ]
@@ -206,6 +218,8 @@ class _StmtAlways(Stmt):
         return ['Always:']
 
 class _StmtBagModify(Stmt):
+    __slots__ = ('_add_remove', 'count', '_item_grade', 'item_id', '_show_tips')
+
     _stmt_matches = [
         'BAG ADD ITEM REPLACE',
         'BAG MODIFY'
@@ -267,6 +281,8 @@ class _StmtBagModify(Stmt):
         return [f'{self.add_remove} {self.count} {self.item} of {self.item_grade} quality ({self.show_tips})']
 
 class _StmtBlueprintUnlock(Stmt):
+    __slots__ = ('_item_id', '_item_tag', '_show_tips')
+
     _stmt_matches = [
         'BLUEPRINT UNLOCK',
         'BLUEPRINT UNLOCK GROUP'
@@ -293,6 +309,8 @@ class _StmtBlueprintUnlock(Stmt):
         return [f'Unlock blueprint for {items}']
 
 class _StmtCharacterAddBehavior(Stmt):
+    __slots__ = ('_behavior_name', '_character_id', '_id_name', '_param')
+
     _stmt_matches = [
         'NPC ADD BEHAVIOUR',
         'PLAYER ADD BEHAVIOUR'
@@ -323,6 +341,8 @@ class _StmtCharacterAddBehavior(Stmt):
         return lines
 
 class _StmtCharacterRemoveBehavior(Stmt):
+    __slots__ = ('_behavior_name', '_character_id', '_id_name')
+
     _stmt_matches = [
         'NPC REMOVE BEHAVIOUR',
         'PLAYER REMOVE BEHAVIOUR'
@@ -346,6 +366,8 @@ class _StmtCharacterRemoveBehavior(Stmt):
 # Checks that an event script has played out, since event scripts do not have 
 # states in the same way that missions do.
 class _StmtCheckEndScript(Stmt):
+    __slots__ = ('flag', 'mission_id', 'result')
+
     _stmt_matches = [
         'CHECK END SCRIPT'
     ]
@@ -363,6 +385,8 @@ class _StmtCheckEndScript(Stmt):
         return [f'Check if mission {self.mission_name or self.mission_id} is result {self.result} flag {self.flag}']
 
 class _StmtCheckMissionState(Stmt):
+    __slots__ = ('mission_id', '_flag', '_state')
+
     _stmt_matches = [
         'CHECK MISSION CURRENT STATE'
     ]
@@ -402,6 +426,8 @@ class _StmtCheckMissionState(Stmt):
             return [f'{self.mission_name} is in state {self._state} with flag {self._flag}']
 
 class _StmtCheckNpcFavor(Stmt):
+    __slots__ = ('_compare', 'npc_id', '_value')
+
     _stmt_matches = [
         'CHECK NPC FAVOR'
     ]
@@ -423,6 +449,8 @@ class _StmtCheckNpcFavor(Stmt):
         return [f'Check if {text.npc(self.npc_id)} has favor {self.compare} {self._value}']
 
 class _StmtCheckNpcLeaveTown(Stmt):
+    __slots__ = ('flag', 'npc_id')
+
     _stmt_matches = [
         'CHECK NPC LEAVE TOWN'
     ]
@@ -444,6 +472,8 @@ class _StmtCheckNpcLeaveTown(Stmt):
         return [f'Check if {text.npc(self.npc_id)} {self.checking_for}']
 
 class _StmtCheckNpcRelationship(Stmt):
+    __slots__ = ('_compare', 'npc', '_level')
+
     _stmt_matches = [
         'CHECK PLAYER NPC RELATION SHIP'
     ]
@@ -473,6 +503,8 @@ class _StmtCheckNpcRelationship(Stmt):
         return [f'Check relationship with {text.npc(self.npc)} is {self.level}']
 
 class _StmtCheckVar(Stmt):
+    __slots__ = ('_compare', 'name', '_ref')
+
     _stmt_matches = [
         'CHECK VAR'
     ]
@@ -494,6 +526,8 @@ class _StmtCheckVar(Stmt):
         return [f'Check if {self.name} is {self.compare} {self._ref}']
 
 class _StmtCutsceneStart(Stmt):
+    __slots__ = ('_cutscene_id', '_duration')
+
     _stmt_matches = [
         'CUTSCENE START'
     ]
@@ -533,6 +567,8 @@ class _StmtCutsceneStart(Stmt):
         return lines
 
 class _StmtGlobalBlackBoardSet(Stmt):
+    __slots__ = ('key', 'info')
+
     _stmt_matches = [
         'GLOBAL BLACK BOARD SET'
     ]
@@ -558,6 +594,8 @@ class _StmtGlobalBlackBoardSet(Stmt):
 
 
 class _StmtMissionProgress(Stmt):
+    __slots__ = ('_mission_id',)
+
     _stmt_matches = [
         'MISSION BEGIN',
         'DELIVER MISSION',
@@ -576,6 +614,8 @@ class _StmtMissionProgress(Stmt):
         return [f'{self.stmt} {self._mission_id}']
 
 class _StmtNpcAddIdle(Stmt):
+    __slots__ = ('_flag_name', '_look_at_npc_id', '_npc_id', '_order', '_scene_name')
+
     _stmt_matches = [
         'NPC ADD IDLE',
         'NPC ADD IDLE 2',
@@ -601,6 +641,8 @@ class _StmtNpcAddIdle(Stmt):
         return [line]
 
 class _StmtNpcChangeFavor(Stmt):
+    __slots__ = ('favor', 'npc_id')
+
     _stmt_matches = [
         'NPC CHANGE FAVOR'
     ]
@@ -621,6 +663,8 @@ class _StmtNpcChangeFavor(Stmt):
         return [f'{self.npc} gains {self.favor} favor']
     
 class _StmtNpcRemoveIdle(Stmt):
+    __slots__ = ('_id_name', '_npc_id')
+
     _stmt_matches = [
         'NPC REMOVE IDLE',
         'NPC REMOVE IDLE 2',
@@ -638,6 +682,8 @@ class _StmtNpcRemoveIdle(Stmt):
         return [f'{self.npc_name} stops standing still']
 
 class _StmtOnEveryDayStart(Stmt):
+    __slots__ = ()
+
     _stmt_matches = [
         'ON EVERY DAY START'
     ]
@@ -650,6 +696,8 @@ class _StmtOnEveryDayStart(Stmt):
         return ['At the beginning of the day:']
 
 class _StmtQuiet(Stmt):
+    __slots__ = ()
+
     _stmt_matches = [
         'CAMERA NATURAL SET',
         'CAMERA PATH START',
@@ -665,6 +713,8 @@ class _StmtQuiet(Stmt):
         return []
     
 class _StmtActorShowBubble(Stmt):
+    __slots__ = ('_text_id', '_npc_id', '_bubble')
+
     _stmt_matches = [
         'ACTOR SHOW BUBBLE'
     ]
@@ -678,6 +728,8 @@ class _StmtActorShowBubble(Stmt):
         return self._bubble.read()
 
 class _StmtNpcSendGift(Stmt):
+    __slots__ = ('_duration_hour', 'gift_id', 'npc_id', '_scene_pos')
+
     _stmt_matches = [
         'ACTION NPC SEND GIFT'
     ]
@@ -698,6 +750,8 @@ class _StmtNpcSendGift(Stmt):
 # Choice with the given index is made in response to conversation segment with
 # given ID, during conversation with given cId.
 class _StmtOnConversationChoiceMade(Stmt):
+    __slots__ = ('_c_id', 'conv_choice_index', 'conv_segment_id')
+
     _stmt_matches = [
         'ON CONVERSATION CHOICE MADE'
     ]
@@ -737,6 +791,8 @@ class _StmtOnConversationChoiceMade(Stmt):
 
 # Conversation with cId finishes, regardless of outcome.
 class _StmtOnConversationEnd(Stmt):
+    __slots__ = ('c_id', 'mission_id', 'npc', '_order')
+
     _stmt_matches = [
         'ON CONVERSATION END'
     ]
@@ -755,6 +811,8 @@ class _StmtOnConversationEnd(Stmt):
         return [f'(cId {self.c_id}) After the conversation ends:']
 
 class _StmtOnConversationEndSegment(Stmt):
+    __slots__ = ('c_id', 'segment_id', '_mission_id', 'npc', '_order')
+
     _stmt_matches = [
         'ON CONVERSATION END SEGMENT'
     ]
@@ -784,6 +842,8 @@ class _StmtOnConversationEndSegment(Stmt):
         return lines
 
 class _StmtOnHourChanged(Stmt):
+    __slots__ = ('_hour', '_order')
+
     _stmt_matches = [
         'ON HOUR CHANGED'
     ]
@@ -796,6 +856,8 @@ class _StmtOnHourChanged(Stmt):
         return [f'When the time is {self._hour}:00 (order: {self._order}):']
 
 class _StmtOnInteractWithNpc(Stmt):
+    __slots__ = ('_npc', '_order')
+
     _stmt_matches = [
         'ON INTERACT WITH NPC'
     ]
@@ -808,6 +870,8 @@ class _StmtOnInteractWithNpc(Stmt):
         return [f'On speaking to {text.npc(self._npc)}']
 
 class _StmtOnPlayerWakeUp(Stmt):
+    __slots__ = ()
+
     _stmt_matches = [
         'ON PLAYER WAKE UP'
     ]
@@ -820,6 +884,8 @@ class _StmtOnPlayerWakeUp(Stmt):
         return ['When the player wakes up:']
 
 class _StmtOnSceneChange(Stmt):
+    __slots__ = ('_from_scene', '_to_scene')
+
     _stmt_matches = [
         'ON SCENE CHANGE END',
         'ON SCENE CHANGE POST',
@@ -834,6 +900,8 @@ class _StmtOnSceneChange(Stmt):
         return [f'When the player moves from {self._from_scene} to the {self._to_scene}:']
 
 class _StmtRunMission(Stmt):
+    __slots__ = ('mission_id',)
+
     _stmt_matches = [
         'RUN MISSION'
     ]
@@ -857,6 +925,8 @@ class _StmtRunMission(Stmt):
         return [f'Run mission {self.mission_name}']
 
 class _StmtSendMail(Stmt):
+    __slots__ = ('mail_id',)
+
     _stmt_matches = [
         'MAIL SEND TO BOX'
     ]
@@ -872,13 +942,16 @@ class _StmtSendMail(Stmt):
         return ['The player receives a letter:', f'{{{{mail|{self.mail_id}}}}}']
 
 class _StmtSetSpecialGiftRuleState(Stmt):
+    __slots__ = ('_rule_id', '_state', '_special_gift_rule')
+
     _stmt_matches = [
         'SET SPECIAL GIFT RULE STATE'
     ]
 
     def extract_properties(self) -> None:
-        self._rule_id: int = int(self._stmt.get('ruleID'))
-        self._state: int   = int(self._stmt.get('state'))
+        self._rule_id: int                   = int(self._stmt.get('ruleID'))
+        self._state: int                     = int(self._stmt.get('state'))
+        self._special_gift_rule: dict | None = None
     
     @property
     def item(self) -> str:
@@ -890,9 +963,12 @@ class _StmtSetSpecialGiftRuleState(Stmt):
     def npc(self) -> str:
         return text.npc(self.special_gift_rule['npcID'])
     
-    @cached_property
+    @property
     def special_gift_rule(self) -> dict:
-        return next(rule for rule in DesignerConfig.SpecialGiftRule if rule['ruleID'] == self._rule_id)
+        note_reads('SpecialGiftRule')
+        if self._special_gift_rule is None:
+            self._special_gift_rule = next(rule for rule in DesignerConfig.SpecialGiftRule if rule['ruleID'] == self._rule_id)
+        return self._special_gift_rule
 
     def read_bad_reply(self) -> list[str]:
         return self.read_reply(self.special_gift_rule['badReplyText'])
@@ -964,6 +1040,8 @@ class _StmtSetSpecialGiftRuleState(Stmt):
         
 
 class _StmtSetVar(Stmt):
+    __slots__ = ('name', '_scope', '_set', 'value')
+
     _stmt_matches = [
         'SET VAR'
     ]
@@ -997,6 +1075,8 @@ class _StmtSetVar(Stmt):
         return [f'{self.action} {self.name} {self.verb} {self.value}']
 
 class _StmtShowConversation(Stmt):
+    __slots__ = ('c_id', '_dialogue_ids', '_conversation')
+
     _stmt_matches = [
         'SHOW CONVERSATION',
         'SHOW CONVERSATION CACHED'
@@ -1028,6 +1108,8 @@ class _StmtShowConversation(Stmt):
         return lines
 
 class _StmtStartInteractive(Stmt):
+    __slots__ = ('_inst_id', '_npc_id', 'option_id', 'type')
+
     _stmt_matches = [
         'START INTERACTIVE'
     ]
@@ -1059,6 +1141,8 @@ class _StmtStartInteractive(Stmt):
         return [f'The player {self.interaction} {self.npc}']
 
 class _StmtUpdateMissionInfo(Stmt):
+    __slots__ = ('_desc', '_mission_id', '_npc', '_req_target', '_target_id', '_title', '_type')
+
     _stmt_matches = [
         'UPDATE MISSION INFO'
     ]
@@ -1112,3 +1196,15 @@ class _StmtUpdateMissionInfo(Stmt):
         return lines
 
 # ------------------------------------------------------------------------------
+
+# -- Dispatch ------------------------------------------------------------------
+
+# STMT name to the class that handles it. Where two classes list the same name,
+# the one defined first wins, as when each class was asked in turn.
+@cache
+def _get_stmt_classes() -> dict[str, Type[Stmt]]:
+    stmt_classes = {}
+    for stmt_class in Stmt.__subclasses__():
+        for name in stmt_class._stmt_matches:
+            stmt_classes.setdefault(name, stmt_class)
+    return stmt_classes
@@ -10,7 +10,9 @@ from sandrock                           import *
 from sandrock.lib.asset                 import Asset
 from sandrock.structures.story_xml.stmt import *
 
-if TYPE_CHECKING: from sandrock.structures.story import Mission
+if TYPE_CHECKING:
+    from sandrock.preproc.story_script import StmtRecord, TriggerRecord
+    from sandrock.structures.story     import Mission
 
 # ------------------------------------------------------------------------------
 
@@ -24,19 +26,19 @@ class _Actions:
 
 # ------------------------------------------------------------------------------
 
+# Wraps a trigger's record; see sandrock/preproc/story_script.py.
 class Trigger:
-    def __init__(self, trigger: ElementTree.Element, order: int, mission: Mission):
-        self._mission: Mission             = mission
-        self.order: int                    = order
-        self._trigger: ElementTree.Element = trigger
+    def __init__(self, record: TriggerRecord, order: int, mission: Mission):
+        self._mission: Mission = mission
+        self.order: int        = order
 
-        self.procedure: float              = float(self._trigger.get('procedure'))
-        self._repeat: int                  = int(self._trigger.get('repeat'))
-        self._step: float                  = float(self._trigger.get('step'))
+        self.procedure: float  = record['procedure']
+        self._repeat: int      = record['repeat']
+        self._step: float      = record['step']
         self._structure = {
-            'EVENTS': self.eval_stmts(trigger.findall('EVENTS')),
-            'CONDITIONS': self.eval_stmts(trigger.findall('CONDITIONS')),
-            'ACTIONS': self.eval_stmts(trigger.findall('ACTIONS'))
+            'EVENTS': self.eval_stmts(record['events']),
+            'CONDITIONS': self.eval_stmts(record['conditions']),
+            'ACTIONS': self.eval_stmts(record['actions'])
             # 'RELY' ?
         }
     
@@ -46,6 +48,10 @@ class Trigger:
     
     def is_run_mission(self, mission_id: int = None) -> bool:
         return any(action.is_run_mission(mission_id) for action in self._structure['ACTIONS'])
+
+    @property
+    def run_mission_ids(self) -> list[int]:
+        return [action.mission_id for action in self._structure['ACTIONS'] if action.is_run_mission()]
     
     @property
     def ended_conversation_c_id(self) -> int:
@@ -201,21 +207,14 @@ class Trigger:
         return (mission_id, [stmt.name for stmt in var_stmts])
 
     
-    def eval_stmts(self, element: list[ElementTree.Element]):
-        assert len(element) == 1
-        element = element[0]
+    # None if the trigger didn't have exactly one element for the section.
+    def eval_stmts(self, records: list[StmtRecord] | None):
+        assert records is not None
         stmts = []
         
-        for child in element:
-            if child.tag == 'GROUP':
-                group_index = int(child.get('index'))
-
-                for stmt in child.findall('STMT'):
-                    stmt_class = Stmt.find_stmt_class(stmt)
-                    stmts.append(stmt_class(stmt, group_index, self._mission))
-            elif child.tag == 'STMT':
-                stmt_class = Stmt.find_stmt_class(child)
-                stmts.append(stmt_class(child, None, self._mission))
+        for record in records:
+            stmt_class = Stmt.find_stmt_class(record)
+            stmts.append(stmt_class(record, record.group_index, self._mission))
 
         return stmts
     
@@ -26,9 +26,8 @@ def run() -> None:
     i = 0
 
     for interest in get_interest_points():
-        behav = read_json(interest['behaviour'])
-        if interest['type'] == 'SceneItemBox' and behav['m_Enabled']:
-            update_treasure(results, interest['scene'], behav)
+        if interest['type'] == 'SceneItemBox' and interest['enabled']:
+            update_treasure(results, interest['scene'], interest)
 
     results = dict(sorted(results.items()))
     for id, result in results.items():
@@ -40,13 +39,13 @@ def run() -> None:
     }
     write_lua(config.output_dir / f'lua/{page_name}.lua', data)
 
-def update_treasure(results: Results, name: str, behaviour: Any) -> None:
+def update_treasure(results: Results, name: str, interest: Any) -> None:
     scene_id          = sceneinfo.scene_id(name)
     scene_system_name = sceneinfo.scene_system_name(scene_id)
     if scene_id not in results:
         results[scene_id] = {'value0': scene_system_name, 'value1': []}
     
-    chest_data = {'id': behaviour['id'], 'generatorId': behaviour['generatorId']}
+    chest_data = {'id': interest['box_id'], 'generatorId': interest['generator_id']}
     results[scene_id]['value1'].append(chest_data)
     
 if __name__ == '__main__':
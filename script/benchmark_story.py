@@ -0,0 +1,100 @@
+'''
+Measure how long building the story takes and how much memory it holds: the
+Story itself, then every mission's triggers and STMTs.
+
+    python -m script.benchmark_story [--repeat N]
+
+Run it before and after a change to the story structures to compare. Also times
+parsing the story scripts with the process pool against one process, building
+the story records from the parsed corpus against loading them from the cache,
+and looking up the class of every STMT in the story through the dispatch table
+against asking each STMT class in turn, as `Stmt.find_stmt_class` used to.
+
+Requires:
+    - story_script
+'''
+
+from __future__ import annotations
+
+from sandrock                           import *
+from sandrock.preproc                   import get_story_records, get_story_script
+from sandrock.preproc.story_script      import StmtRecord, find_story_records, find_story_script
+from sandrock.structures.story          import Story
+from sandrock.structures.story_xml.stmt import Stmt
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+# ------------------------------------------------------------------------------
+
+def run() -> None:
+    parser = argparse.ArgumentParser(prog='python -m script.benchmark_story')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    scripts = get_story_script()
+    pooled  = _best_of(args.repeat, find_story_script)
+    serial  = _best_of(args.repeat, lambda: find_story_script(workers=1))
+    print(f'Story scripts: parsed in a process pool {pooled:.2f} s, in one worker {serial:.2f} s')
+
+    built   = _best_of(args.repeat, lambda: find_story_records(scripts))
+    loaded  = _best_of(args.repeat, _load_story_records)
+    print(f'Story records: built from the corpus {built:.2f} s, loaded from the cache {loaded:.2f} s')
+
+    # Parse the records up front so that only the structures are measured.
+    records = get_story_records()
+    stmts   = [
+        stmt
+        for record in records.values()
+        for trigger in record['triggers']
+        for section in ('events', 'conditions', 'actions')
+        for stmt in trigger[section] or ()
+    ]
+    print(f'{len(records)} scripts, {len(stmts)} STMTs')
+
+    dispatch = _best_of(args.repeat, lambda: [Stmt.find_stmt_class(stmt) for stmt in stmts])
+    linear   = _best_of(args.repeat, lambda: [_find_stmt_class_linear(stmt) for stmt in stmts])
+    print(f'STMT class lookup: table {dispatch * 1000:.1f} ms, linear scan {linear * 1000:.1f} ms')
+
+    build = _best_of(args.repeat, _build_story)
+    print(f'Story with all triggers built: {build:.2f} s')
+
+    gc.collect()
+    tracemalloc.start()
+    story         = _build_story()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    triggers = sum(len(mission.triggers) for mission in story.missions.values())
+    print(f'Memory held: {current / 2**20:.1f} MB (peak {peak / 2**20:.1f} MB) for {len(story.missions)} missions, {triggers} triggers')
+
+# -- Private -------------------------------------------------------------------
+
+def _build_story() -> Story:
+    story = Story()
+    for mission in story.missions.values():
+        mission.get_content()
+    return story
+
+def _load_story_records() -> None:
+    get_story_records.cache_clear()
+    get_story_records()
+
+def _best_of(repeat: int, func: Callable[[], Any]) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def _find_stmt_class_linear(stmt: StmtRecord) -> type[Stmt]:
+    for stmt_class in Stmt.__subclasses__():
+        if stmt_class.is_type_match(stmt):
+            return stmt_class
+    return Stmt
+
+if __name__ == '__main__':
+    run()
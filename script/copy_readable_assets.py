@@ -10,9 +10,7 @@ Requires:
 
 from sandrock import *
 from sandrock.lib.text import load_text
-from sandrock.preproc import get_config_paths
-
-import urllib.parse
+from sandrock.preproc import get_config_paths, get_story_script
 
 def do() -> None:
     copy_designer_config()
@@ -38,20 +36,9 @@ def copy_text() -> None:
         write_yaml(out_path, texts)
 
 def copy_mission() -> None:
-    bundle = Bundle('story_script')
-    for asset in bundle.assets:
-        if asset.type == 'TextAsset':
-            out_path = config.output_dir / 'mission' / (asset.name + '.xml')
-            xml = asset.read_xml()
-            _recursive_unquote(xml)
-            write_xml(out_path, xml)
-
-def _recursive_unquote(element: ElementTree.Element) -> None:
-    for k, v in element.attrib.items():
-        if v and isinstance(v, str) and '%' in v:
-            element.attrib[k] = urllib.parse.unquote(v)
-    for child in element:
-        _recursive_unquote(child)
+    for script_id, xml in get_story_script().items():
+        out_path = config.output_dir / 'mission' / f'{script_id}.xml'
+        write_xml(out_path, xml)
 
 if __name__ == '__main__':
     do()
@@ -29,7 +29,7 @@ the inventory?
 from sandrock                        import *
 from sandrock.lib.designer_config    import DesignerConfig
 from sandrock.lib.text               import text
-from sandrock.structures.story       import Story
+from sandrock.structures.story       import get_story, get_story_stats
 
 from sandrock.item_source.main   import get_item_sources, get_item_unlockers
 from sandrock.item_source.common import *
@@ -45,7 +45,7 @@ from sandrock.item_source.common import *
 
 item_prototypes = DesignerConfig.ItemPrototype
 scene_name_to_id = sceneinfo.get_scene_system_name_to_id()
-story = Story()
+story = get_story()
 
 _manual_additions = {
     # Xiaohongshu: Gecko Station Abandoned Ruins
@@ -135,6 +135,8 @@ def main() -> None:
     for item_id, sources in _manual_removals.items():
         item_sources[item_id].difference_update(sources)
 
+    item_sources     = structure_results(item_sources)
+    unlocker_sources = structure_results(unlocker_sources)
     results = format_results(item_sources, nominal_sources, unlocker_sources)
     results = dict(sorted(results.items()))
     output = {
@@ -149,6 +151,9 @@ def main() -> None:
     write_lua(config.output_dir / 'lua/AssetItemSource.lua', output)
     write_lua(config.output_dir / 'lua/AssetItemUnimplemented.lua', unimplemented)
 
+    stats = get_story_stats()
+    print(f'Story built {stats["builds"]} time(s), reused {stats["hits"]} time(s)')
+
 # -- Preparing Results ---------------------------------------------------------
 
 def format_results(
@@ -224,7 +229,7 @@ def format_unlockers(sources: list[ItemSource], item_sources: dict[int, list[Ite
 def format_sources(sources: list[ItemSource]) -> list[dict]:
     formatted = {}
 
-    sources = sorted(sources, key=lambda source: (source[0], source[1] if len(source) > 1 else '', source[2] if len(source) > 2 else ''))
+    sources = sorted(sources, key=lambda source: tuple(str(part) for part in (source + ('', ''))[:3]))
 
     for source in sources:
         format_source(formatted, source, sources)
@@ -293,13 +298,12 @@ def format_source(formatted: dict, source: ItemSource, sources: list[ItemSource]
                     add_or_append(formatted, 'assembly', assembly_stations[int(source[2])])
                 case 'cooking':
                     add_or_append(formatted, 'cooking', cooking_stations[int(source[2])])
-                case s if s.startswith('item:'):
+                case SourceRef('item', _):
                     add_or_append(formatted, 'crafting', get_name(source[1]))
 
         case 'delivery':
-            _, id_str = source[1].split(':')
             pre_order_point = next(
-                (point for point in DesignerConfig.PreOrderPoint if point['id'] == int(id_str)), None
+                (point for point in DesignerConfig.PreOrderPoint if point['id'] == source[1].id), None
             )
             add_or_append(formatted, 'delivery', wiki(pre_order_point['nameId']))
 
@@ -313,7 +317,7 @@ def format_source(formatted: dict, source: ItemSource, sources: list[ItemSource]
             add_or_append(formatted, 'ruin_hazard', get_name(source[1]))
         
         case 'mail':
-            mail_id = int(source[2].split(':')[1])
+            mail_id = source[2].id
             add_or_append(formatted, 'mail', [get_name(source[1]), mail_id])
 
         case 'mission':
@@ -490,7 +494,7 @@ def add_or_append(formatted: dict, key: str, value: str) -> None:
 
 def all_spouses_in_source(sources: list[ItemSource], event: str, gender: int = -1) -> bool:
     sources_for_event = [source for source in sources if source[0] == 'npc' and source[1] == event]
-    npc_ids_for_event = [int(source[2].split(':')[1]) for source in sources_for_event]
+    npc_ids_for_event = [source[2].id for source in sources_for_event]
 
     npc_ids_for_gender = []
     for npc_id, npc_data in DesignerConfig.Npc.items():
@@ -502,15 +506,16 @@ def all_spouses_in_source(sources: list[ItemSource], event: str, gender: int = -
     return set(npc_ids_for_event) == set(npc_ids_for_gender)
 
 npc_name_ids = {npc['nameID']: npc['id'] for npc in DesignerConfig.Npc}
-def get_name(s: str) -> str:
-    type_, id_str = s.split(':')
+# Sources share a few thousand distinct references, so look each up only once.
+@cache
+def get_name(ref: SourceRef) -> str:
+    type_, id = ref
 
     if type_ == 'scene':
-        if not id_str.isdigit():
-            id_str = sceneinfo.scene_id(id_str)
-        return text.scene(int(id_str))
+        if isinstance(id, str):
+            id = sceneinfo.scene_id(id)
+        return text.scene(int(id))
     
-    id = int(id_str)
     if type_ == 'npc':
         if id in npc_name_ids:
             id = npc_name_ids[id]
@@ -151,7 +151,7 @@ def run() -> None:
 def print_cutscene_photos() -> None:
     cutscene_photos = DesignerConfig.CutscenePhotos
 
-    story = Story()
+    story = get_story()
 
     linkable_words = []
     for id, npc in DesignerConfig.Npc.items():
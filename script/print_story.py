@@ -1,13 +1,32 @@
 '''
 Print out every mission, event, and controller in the story asset bundle, along 
 with a table of contents.
+
+    python -m script.print_story
+    python -m script.print_story --incremental [--workers N] [--budget SECONDS]
+
+With --incremental, missions are rendered in worker processes, and only the ones
+whose script, the scripts of the missions it shows or names, its designer configs
+or the text changed since the last run are rendered again; the manifest in
+out_story/manifest.json records what each mission was rendered from. A mission that raises or runs over its time budget is reported
+and skipped instead of stopping the run, so the `broken` list isn't needed.
 '''
 
 from __future__   import annotations
 from pathvalidate import sanitize_filename
 
-from sandrock                  import *
-from sandrock.structures.story import *
+from sandrock                     import *
+from sandrock.lib.designer_config import record_reads
+from sandrock.lib.watchdog        import run_with_budget
+from sandrock.preproc             import fingerprint_paths, get_config_paths, get_story_headers, get_story_records
+from sandrock.structures.story    import *
+
+import argparse
+import hashlib
+import time
+
+if TYPE_CHECKING:
+    from sandrock.preproc.story_script import MissionRecord
 
 # ------------------------------------------------------------------------------
 
@@ -35,8 +54,20 @@ broken = [
 # ------------------------------------------------------------------------------
 
 def run() -> None:
+    parser = argparse.ArgumentParser(prog='python -m script.print_story')
+    parser.add_argument('--incremental', action='store_true', help='render only changed missions, in worker processes')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--budget', type=float, default=60.0, help='seconds each mission may take to render')
+    args = parser.parse_args()
+
+    if args.incremental:
+        run_incremental(args.workers, args.budget)
+    else:
+        run_all()
+
+def run_all() -> None:
     mission_to_ids   = defaultdict(list)
-    story            = Story()
+    story            = get_story()
     story_output_dir = config._root / 'out_story'
 
     processed_missions_count = 0
@@ -69,6 +100,79 @@ def run() -> None:
         percent_processed = (processed_missions_count / total_missions_count) * 100
         print(f'Processed {processed_missions_count}/{total_missions_count} missions ({percent_processed:.2f}%)')
     
+    _write_table_of_contents(story_output_dir, mission_to_ids)
+
+def run_incremental(workers: int | None = None, budget: float = 60.0) -> None:
+    story_output_dir = config._root / 'out_story'
+    manifest_path    = story_output_dir / 'manifest.json'
+    story_output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Parse the story here first, so the workers all load it from the cache.
+    get_story_records()
+    story    = get_story()
+    shared   = _shared_fingerprint()
+    manifest = _read_manifest(manifest_path)
+
+    mission_to_ids = defaultdict(list)
+    paths          = {}
+    stale          = []
+
+    for mission_id, mission in story.missions.items():
+        mission_to_ids[mission.name].append(mission_id)
+        paths[mission_id] = (Path(sanitize_filename(mission.name)) / f'{mission_id}.txt').as_posix()
+
+        entry = manifest.get(mission_id)
+        if (
+            entry is None
+            or entry['path'] != paths[mission_id]
+            or not (story_output_dir / entry['path']).exists()
+            or entry['fingerprint'] != _mission_fingerprint(story, mission_id, entry['config_keys'], shared)
+        ):
+            stale.append(mission_id)
+
+    # Outputs of missions that were removed or renamed.
+    for mission_id, entry in list(manifest.items()):
+        if paths.get(mission_id) != entry['path']:
+            (story_output_dir / entry['path']).unlink(missing_ok=True)
+            del manifest[mission_id]
+
+    print(f'Rendering {len(stale)} of {len(story.missions)} missions; the rest are unchanged')
+
+    start   = time.perf_counter()
+    skipped = []
+    try:
+        for count, outcome in enumerate(run_with_budget(stale, _render_mission, budget, workers, _start_worker), 1):
+            mission_id = outcome['item']
+            if outcome['status'] != 'done':
+                manifest.pop(mission_id, None)
+                skipped.append(outcome)
+                print(f'Skipped mission {mission_id} ({outcome["status"]} after {outcome["seconds"]:.1f}s): {outcome["error"]}')
+                continue
+
+            content, config_keys = outcome['result']
+            mission_txt_path     = story_output_dir / paths[mission_id]
+            mission_txt_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(mission_txt_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+
+            manifest[mission_id] = {
+                'path':        paths[mission_id],
+                'fingerprint': _mission_fingerprint(story, mission_id, config_keys, shared),
+                'config_keys': config_keys,
+            }
+            print(f'Rendered {count}/{len(stale)} missions: {mission_id} in {outcome["seconds"]:.2f}s')
+    finally:
+        write_json(manifest_path, {str(mission_id): entry for mission_id, entry in sorted(manifest.items())})
+
+    print(f'Rendered {len(stale) - len(skipped)} missions in {time.perf_counter() - start:.1f}s')
+    if skipped:
+        print(f'Skipped {len(skipped)} missions: {", ".join(str(outcome["item"]) for outcome in skipped)}')
+
+    _write_table_of_contents(story_output_dir, mission_to_ids)
+
+# -- Private -------------------------------------------------------------------
+
+def _write_table_of_contents(story_output_dir: Path, mission_to_ids: dict[str, list[int]]) -> None:
     table_of_contents = []
 
     for mission_name, ids in sorted(mission_to_ids.items()):
@@ -84,5 +188,68 @@ def run() -> None:
     with open(toc_txt_path, 'w', encoding='utf-8') as f:
         f.write('\n'.join(table_of_contents))
 
+# Run in the workers: each renders from its own story, and records the designer
+# configs the mission read.
+def _start_worker() -> None:
+    get_story()
+
+def _render_mission(mission_id: int) -> tuple[str, list[str]]:
+    with record_reads() as config_keys:
+        content = '\n'.join(get_story().get_mission(mission_id).read())
+    return content, sorted(config_keys)
+
+# Mission ID to how its output was rendered: the output path, the configs read
+# and the fingerprint of everything it was rendered from.
+def _read_manifest(manifest_path: Path) -> dict[int, dict[str, Any]]:
+    try:
+        return {int(mission_id): entry for mission_id, entry in read_json(manifest_path).items()}
+    except Exception:
+        return {}
+
+# What every mission is rendered from: the text and its configs, and the code
+# that renders it, including the text and config loaders.
+def _shared_fingerprint() -> str:
+    sandrock_dir = Path(__file__).parents[1] / 'sandrock'
+    modules      = sorted((sandrock_dir / 'structures').rglob('*.py')) + sorted((sandrock_dir / 'lib').rglob('*.py')) + [Path(__file__)]
+    text_paths   = [get_config_paths()['text'][language] for language in config.languages]
+    return hashlib.sha1(repr((config.version, fingerprint_paths(['localization', *text_paths, *modules]))).encode('utf-8')).hexdigest()
+
+# A mission's output also depends on its parents, whose triggers are printed as
+# its run conditions, on the missions its and its parents' STMTs refer to, whose
+# names are printed, and on the first parents of all of these, which names are
+# taken from.
+def _mission_fingerprint(story: Story, mission_id: int, config_keys: list[str], shared: str) -> str:
+    config_paths = get_config_paths()['designer_config']
+
+    script_ids = {mission_id, *story.mission_parents.get(mission_id, ())}
+    for script_id in list(script_ids):
+        if script_id in story.missions:
+            script_ids.update(_referenced_mission_ids(story.missions[script_id].record))
+    for script_id in list(script_ids):
+        chain = [script_id]
+        while (parents := story.mission_parents.get(chain[-1])) and parents[0] not in chain:
+            chain.append(parents[0])
+        script_ids.update(chain)
+
+    scripts = [(script_id, _script_fingerprint(script_id)) for script_id in sorted(script_ids)]
+    configs = fingerprint_paths([config_paths.get(key, config.assets_root / 'designer_config' / key) for key in config_keys])
+    return hashlib.sha1(repr((shared, scripts, config_keys, configs)).encode('utf-8')).hexdigest()
+
+def _referenced_mission_ids(record: MissionRecord) -> set[int]:
+    mission_ids = set(record['children'])
+    for trigger in record['triggers']:
+        for section in ('events', 'conditions', 'actions'):
+            for stmt in trigger[section] or ():
+                mission_id = stmt.get('missionId')
+                if mission_id and mission_id.isdigit():
+                    mission_ids.add(int(mission_id))
+    return mission_ids
+
+# A script's XML fingerprint, or None for a mission without a script.
+@cache
+def _script_fingerprint(script_id: int) -> str | None:
+    header = get_story_headers().get(script_id)
+    return fingerprint_paths([header['path']]) if header is not None else None
+
 if __name__ == '__main__':
     run()
@@ -7,6 +7,7 @@ from __future__ import annotations
 from sandrock          import *
 from sandrock.lib.designer_config import _DesignerConfigWrapper
 from sandrock.lib.text import load_text
+from sandrock.lib.text_index import load_text_index
 from sandrock.preproc  import get_config_paths
 from sandrock.structures.conversation import *
 from sandrock.structures.story    import *
@@ -100,10 +101,9 @@ def print_monster_spawns() -> None:
     count = 0
 
     for interest in get_interest_points():
-        behav = read_json(interest['behaviour'])
         if interest['type'] == 'MonsterMarkSpawnerExecutor':
             count += 1
-            for info in behav['spawnerMonsterInfos']:
+            for info in interest['spawner_monster_infos']:
                 monster = monsters[info['protoId']]
                 min_level = info['level']['x']
                 max_level = info['level']['y']
@@ -211,12 +211,12 @@ def print_items_with_item_tag(tag_id: int) -> None:
             print(f'{item["id"]}: {text.item(item["id"])}')
 
 def print_mission(id: int) -> None:
-    story = Story()
+    story = Story(lazy=True)
     mission = story.get_mission(id)
     mission.print()
 
 def print_mission_names() -> None:
-    story = Story()
+    story = get_story()
     misson_names = story.get_mission_names()
     print(json.dumps(misson_names, indent=2))
 
@@ -224,6 +224,14 @@ def print_npc_names() -> None:
     for npc in sorted(DesignerConfig.Npc, key=lambda npc: npc['id']):
         print(f'{npc["id"]}: {text(npc["nameID"])}')
 
+# Print the texts matching a query, e.g. print_text_search('mcmole'), or with
+# mode 'prefix' or 'phrase'.
+def print_text_search(query: str, mode: str = 'exact') -> None:
+    index = load_text_index()
+    texts = load_text(index.language)
+    for id in getattr(index, mode)(query):
+        print(f'{id}: {texts[id]}')
+
 def print_scenes() -> None:
     for scene in sorted(DesignerConfig.Scene, key=lambda item: item['scene']):
         print(f'{scene['scene']}: {text.scene(scene['scene'])}')